@@ -1,43 +1,85 @@
 import asyncio
+import heapq
 from loguru import logger
-from typing import Callable, Awaitable, Dict
+from typing import Callable, Awaitable, Dict, List, Tuple
 
 from app.dependencies import (
     get_app_config,
     run_embedding_sync,
     run_drive_sync,
     scan_and_process_files,
+    start_file_watcher as _start_file_watcher,
 )
 
+# (function, interval in seconds, display name)
+Job = Tuple[Callable[[], Awaitable[None]], int, str]
 
-async def periodic_task(
-    func: Callable[[], Awaitable[None]], interval: int, name: str
-) -> None:
-    """Run a function periodically with a fixed interval."""
+
+async def _run_job(func: Callable[[], Awaitable[None]], name: str) -> None:
+    """Run a single job invocation, logging (not raising) failures."""
     try:
-        while True:
-            try:
-                logger.debug(f"Starting {name} task")
-                await func()
-            except Exception as e:
-                logger.error(f"{name} task failed: {e}")
-            await asyncio.sleep(interval)
+        logger.debug(f"Starting {name} task")
+        await func()
+    except Exception as e:
+        logger.error(f"{name} task failed: {e}")
+
+
+async def scheduler(jobs: List[Job]) -> None:
+    """Run periodic jobs from one coroutine driven by a min-heap of deadlines.
+
+    Every job fires once at startup and then every ``interval`` seconds. A job
+    whose previous run is still in flight is skipped for that tick, so slow
+    jobs never pile up on top of themselves.
+    """
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    # The index breaks deadline ties so functions are never compared
+    heap = [
+        (now, i, interval, func, name) for i, (func, interval, name) in enumerate(jobs)
+    ]
+    heapq.heapify(heap)
+    running: Dict[str, asyncio.Task] = {}
+
+    try:
+        while heap:
+            deadline, i, interval, func, name = heapq.heappop(heap)
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+            task = running.get(name)
+            if task is None or task.done():
+                running[name] = asyncio.create_task(_run_job(func, name))
+            else:
+                logger.debug(f"Skipping {name} task (previous run still in progress)")
+
+            heapq.heappush(heap, (loop.time() + interval, i, interval, func, name))
     except asyncio.CancelledError:
-        logger.info(f"{name} task cancelled")
+        for task in running.values():
+            task.cancel()
+        await asyncio.gather(*running.values(), return_exceptions=True)
+        logger.info("Background scheduler cancelled")
 
 
-async def run_background_tasks() -> Dict[str, asyncio.Task]:
-    """Start all background periodic tasks and return the created tasks."""
+def get_background_jobs() -> List[Job]:
+    """Build the list of periodic jobs from the app configuration."""
     config = get_app_config()
-    task_map = {
-        "embedding_sync": periodic_task(
-            run_embedding_sync, config.embedding_sync_interval, "Embedding Sync"
-        ),
-        "drive_sync": periodic_task(
-            run_drive_sync, config.drive_sync_interval, "Google Drive Sync"
-        ),
-        "file_scan": periodic_task(
-            scan_and_process_files, config.file_scan_interval, "File Scanner"
-        ),
-    }
-    return {name: asyncio.create_task(task) for name, task in task_map.items()}
+    return [
+        (run_embedding_sync, config.embedding_sync_interval, "Embedding Sync"),
+        (run_drive_sync, config.drive_sync_interval, "Google Drive Sync"),
+        (scan_and_process_files, config.file_scan_interval, "File Scanner"),
+    ]
+
+
+async def run_background_tasks(tg: asyncio.TaskGroup) -> Dict[str, asyncio.Task]:
+    """Start the background scheduler in ``tg`` and return the created task."""
+    return {"scheduler": tg.create_task(scheduler(get_background_jobs()))}
+
+
+def start_file_watcher():
+    """Start the PDF file watcher, or return None so the file scanner polls"""
+    try:
+        observer = _start_file_watcher()
+        logger.info("PDF file watcher started")
+        return observer
+    except Exception as e:
+        logger.warning(f"PDF file watcher unavailable, falling back to polling: {e}")
+        return None
@@ -4,9 +4,12 @@ import sys
 from pathlib import Path
 from loguru import logger
 
+from utils.core.config import get_config
+
 
 def setup_logging():
     """Setup enhanced logging with loguru"""
+    config = get_config()
     logger.remove()
 
     # Create logs directory
@@ -21,12 +24,15 @@ def setup_logging():
         level="INFO",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}",
         compression="zip",
+        # Write (and rotate) from a background thread through a buffered file
+        enqueue=True,
+        buffering=8192,
     )
 
-    # Console logging
+    # Console logging (warnings only outside debug mode)
     logger.add(
         sys.stderr,
-        level="INFO",
+        level=config.log_level if config.debug else "WARNING",
         format="<green>{time:HH:mm:ss}</green> | <level>{level}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | {message}",
     )
 
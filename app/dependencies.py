@@ -1,7 +1,14 @@
 """Shared dependencies for the application"""
 
+import asyncio
+import hmac
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
+from typing import NamedTuple, Optional
+from fastapi import Header, HTTPException
 from utils.core.config import get_config
 from utils.core.embed import get_embedding_store
 from utils.data.data_loader import ChunkedDataLoader
@@ -13,21 +20,50 @@ from pathlib import Path
 from utils.core.embed import (
     search_stored_embeddings_async as _search_stored_embeddings_async,
     embed_text_async as _embed_text_async,
+    flush_embeddings,
+    is_document_text,
+    load_embedding_cache as _load_embedding_cache,
+    save_embedding_cache as _save_embedding_cache,
 )
 from utils.core.config import (
     is_local_storage as _is_local_storage,
     is_database_storage as _is_database_storage,
 )
 from utils.data.supabase_client import get_supabase_client as _get_supabase_client
-import json
-from utils.processing.chunker import PDFProcessor
+import numpy as np
+import orjson
+from utils.processing.chunker import PDFProcessor, PDFWatcher, chunk_pdf_worker
 from utils.processing.metadata_extractor import MetadataExtractor
 
 from utils.core.embed import SyncEmbeddingStore
+from utils.core.semantic_cache import SemanticCache
 
 import hashlib
+from watchdog.observers import Observer
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 _embedding_store_instance = None
+_embedding_store_lock = threading.Lock()
+_file_observer = None
+_pdf_pool = None
+_semantic_cache = None
+_supabase_client = None
+
+# Fixed for the lifetime of the process
+_APP_CONFIG = get_config()
+_BOT_API_KEY = os.getenv("BOT_API_KEY")
+_CHUNKED_DATA_DIR = Path("data/chunked_legal_data")
+_IS_LOCAL_STORAGE = _is_local_storage()
+_IS_DATABASE_STORAGE = _is_database_storage()
+_SEMANTIC_CACHE_PATH = Path(_APP_CONFIG.embedding_db_path) / "semantic_cache"
+_EMBEDDING_CACHE_PATH = Path(_APP_CONFIG.embedding_db_path) / "embedding_cache.npz"
+
+# PDFs reported by the file watcher, drained by scan_and_process_files
+pending_files: "asyncio.Queue[Path]" = asyncio.Queue()
 
 
 @lru_cache()
@@ -36,11 +72,8 @@ def get_data_loader():
     return ChunkedDataLoader()
 
 
-def get_embedding_store_instance():
-    """Get the embedding store instance with detailed error logging (singleton per process)"""
-    global _embedding_store_instance
-    if _embedding_store_instance is not None:
-        return _embedding_store_instance
+def _init_embedding_store():
+    """Build the embedding store, logging (not raising) any failure"""
     try:
         store = get_embedding_store()
         if store is None:
@@ -49,7 +82,6 @@ def get_embedding_store_instance():
         logger.info(
             f"✅ Embedding store initialized successfully: {type(store).__name__}"
         )
-        _embedding_store_instance = store
         return store
     except ImportError as e:
         logger.error(f"❌ Import error in embedding store: {e}")
@@ -64,6 +96,19 @@ def get_embedding_store_instance():
         return None
 
 
+def get_embedding_store_instance():
+    """Get the embedding store instance (thread-safe singleton per process)"""
+    global _embedding_store_instance
+    store = _embedding_store_instance
+    if store is not None:
+        return store
+
+    with _embedding_store_lock:
+        if _embedding_store_instance is None:
+            _embedding_store_instance = _init_embedding_store()
+        return _embedding_store_instance
+
+
 @lru_cache()
 def get_drive_sync():
     """Robustly get the Google Drive sync instance, or None if not configured/available."""
@@ -98,27 +143,31 @@ def get_drive_sync():
         return None
 
 
-@lru_cache()
 def get_bot_api_key():
     """Get the bot API key"""
-    return os.getenv("BOT_API_KEY")
+    return _BOT_API_KEY
+
+
+def verify_api_key(x_api_key: str = Header(None)):
+    """Verify API key (constant-time compare)"""
+    expected = (get_bot_api_key() or "").encode()
+    if not hmac.compare_digest((x_api_key or "").encode(), expected):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return x_api_key
 
 
-@lru_cache()
 def get_app_config():
     """Get the app configuration"""
-    return get_config()
+    return _APP_CONFIG
 
 
-@lru_cache()
 def get_embedding_stats():
-    """Dependency wrapper for retrieving embedding statistics"""
+    """Dependency wrapper for retrieving (live) embedding statistics"""
     return _get_embedding_stats()
 
 
-@lru_cache()
 def get_chunked_data_dir() -> Path:
-    return Path("data/chunked_legal_data")
+    return _CHUNKED_DATA_DIR
 
 
 # Check if embeddings exist
@@ -127,36 +176,84 @@ def check_embeddings_exist(query_hash: str):
 
 
 # Async embedding operations
-async def search_stored_embeddings_async(text: str, top_k=1, threshold=0.99):
-    return await _search_stored_embeddings_async(text, top_k, threshold)
+async def search_stored_embeddings_async(query, top_k=1, threshold=0.99):
+    return await _search_stored_embeddings_async(query, top_k, threshold)
 
 
-async def embed_text_async(text: str, store_key: str = ""):
-    return await _embed_text_async(text, store_key)
+async def embed_text_async(
+    text: str, store_key: str = "", store: Optional[bool] = None
+) -> np.ndarray:
+    return await _embed_text_async(text, store_key, store)
 
 
 # Storage configuration
-@lru_cache()
 def is_local_storage() -> bool:
-    return _is_local_storage()
+    return _IS_LOCAL_STORAGE
 
 
-@lru_cache()
 def is_database_storage() -> bool:
-    return _is_database_storage()
+    return _IS_DATABASE_STORAGE
 
 
 # Supabase client
-@lru_cache()
 def get_supabase_client():
-    return _get_supabase_client()
+    """Get the Supabase client (created on first use; raises if not configured)"""
+    global _supabase_client
+    if _supabase_client is None:
+        _supabase_client = _get_supabase_client()
+    return _supabase_client
+
+
+# Semantic answer cache
+def get_semantic_cache() -> SemanticCache:
+    """Get the semantic answer cache (restored from disk on first use)"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+        _semantic_cache.load(_SEMANTIC_CACHE_PATH)
+    return _semantic_cache
+
+
+def save_semantic_cache():
+    """Persist the semantic answer cache, if it was ever used"""
+    if _semantic_cache is not None:
+        _semantic_cache.save(_SEMANTIC_CACHE_PATH)
+
+
+# Embedding LRU (warm restarts skip re-encoding recent questions)
+def load_embedding_cache():
+    _load_embedding_cache(_EMBEDDING_CACHE_PATH)
+
+
+def save_embedding_cache():
+    _save_embedding_cache(_EMBEDDING_CACHE_PATH)
 
 
 # Hash generator
-@lru_cache()
+class QueryCtx(NamedTuple):
+    """A query's UTF-8 bytes and hash, computed once and passed along"""
+
+    encoded: bytes
+    digest: str
+
+
+def _hash_bytes(data: bytes) -> str:
+    """Unique (non-cryptographic) 128-bit hex digest"""
+    if xxhash is not None:
+        return xxhash.xxh3_128(data).hexdigest()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=16384)
+def compute_query_ctx(text: str) -> QueryCtx:
+    """Encode and hash a query once per request"""
+    encoded = text.encode()
+    return QueryCtx(encoded, _hash_bytes(encoded))
+
+
 def generate_query_hash(text: str) -> str:
     """Generate a unique hash for a query"""
-    return hashlib.md5(text.encode()).hexdigest()
+    return compute_query_ctx(text).digest
 
 
 # -----------------------------
@@ -171,7 +268,7 @@ async def run_embedding_sync():
         if isinstance(store, SyncEmbeddingStore):
             before = len(store.sync_queue)
             logger.info(f"🔄 Starting embedding sync ({before} items in queue)")
-            store.sync_pending()
+            await asyncio.to_thread(store.sync_pending)
             after = len(store.sync_queue)
             logger.info(
                 f"✅ Embedding sync: synced {before - after} items, {after} remaining"
@@ -199,47 +296,125 @@ async def run_drive_sync():
         logger.error(f"❌ Google Drive sync failed: {e}")
 
 
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Get the process pool used for CPU-heavy PDF chunking (created lazily)"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn, not fork: the parent runs watchdog and executor threads
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """Shut down the PDF process pool, dropping any queued work"""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def start_file_watcher(watch_dir: str = "data/raw_pdfs"):
+    """Start a watchdog observer that pushes changed PDFs onto pending_files"""
+    global _file_observer
+    loop = asyncio.get_running_loop()
+    Path(watch_dir).mkdir(parents=True, exist_ok=True)
+
+    observer = Observer()
+    event_handler = PDFWatcher(queue=pending_files, loop=loop)
+    observer.schedule(event_handler, watch_dir, recursive=False)
+    observer.start()
+    _file_observer = observer
+    return observer
+
+
+def _is_file_watcher_running() -> bool:
+    return _file_observer is not None and _file_observer.is_alive()
+
+
+def _drain_pending_files() -> list:
+    """Collect the distinct PDFs reported by the watcher since the last scan"""
+    file_names = {}
+    while not pending_files.empty():
+        file_path = pending_files.get_nowait()
+        if file_path.exists():
+            file_names[file_path.name] = None
+    return list(file_names)
+
+
+def _poll_changed_files(scan_dir: Path) -> list:
+    """Fallback: stat every PDF in the directory and diff against the last poll"""
+    if not scan_dir.is_dir():
+        return []
+    current = {
+        (f.name, f.stat().st_mtime_ns) for f in scan_dir.iterdir() if f.suffix == ".pdf"
+    }
+    changed = current - getattr(scan_and_process_files, "last_sig", set())
+    scan_and_process_files.last_sig = current
+    return sorted(name for name, _ in changed)
+
+
 async def scan_and_process_files():
-    """Periodically scan directory for new files and process them"""
+    """Process new/changed PDFs reported by the file watcher.
+
+    The first run (and any run while the watcher is down) polls the whole
+    directory instead, so files that arrived while we weren't watching are
+    still picked up.
+    """
     try:
         scan_dir = Path("data/raw_pdfs")
         chunked_data_dir = get_chunked_data_dir()
         processor = PDFProcessor()
         extractor = MetadataExtractor()
 
-        current_files = {f.name: f.stat().st_mtime for f in scan_dir.glob("*.pdf")}
-
-        if not hasattr(scan_and_process_files, "last_files"):
-            scan_and_process_files.last_files = {}
-
-        new_files = [
-            f
-            for f, mtime in current_files.items()
-            if f not in scan_and_process_files.last_files
-            or mtime > scan_and_process_files.last_files[f]
-        ]
+        if hasattr(scan_and_process_files, "last_sig") and _is_file_watcher_running():
+            new_files = _drain_pending_files()
+        else:
+            new_files = _poll_changed_files(scan_dir)
 
         if new_files:
             logger.info(f"📄 Found {len(new_files)} new/changed PDF(s)")
-            for file_name in new_files:
+
+            # Chunk all files in parallel off the event loop
+            loop = asyncio.get_running_loop()
+            pool = get_pdf_pool()
+            results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        pool, chunk_pdf_worker, str(scan_dir / file_name)
+                    )
+                    for file_name in new_files
+                ],
+                return_exceptions=True,
+            )
+
+            # Embed in this process, one file at a time, so the store sees every write
+            for file_name, chunks in zip(new_files, results):
                 file_path = scan_dir / file_name
                 try:
+                    if isinstance(chunks, BaseException):
+                        raise chunks
+
                     metadata = extractor.extract_from_filename(file_name)
-                    chunks = processor.process_pdf(file_path)
 
                     if chunks:
+                        await asyncio.to_thread(
+                            processor.embed_chunks,
+                            chunks,
+                            processor.output_path(file_path),
+                        )
+
                         for chunk in chunks:
                             chunk["metadata"] = metadata
 
                         output_path = chunked_data_dir / f"{file_path.stem}.json"
-                        with open(output_path, "w") as f:
-                            json.dump(chunks, f)
+                        output_path.write_bytes(orjson.dumps(chunks))
 
                         logger.info(f"✅ Processed {file_name} -> {len(chunks)} chunks")
                 except Exception as e:
                     logger.error(f"❌ Failed to process {file_name}: {e}")
 
-        scan_and_process_files.last_files = current_files
-
     except Exception as e:
         logger.error(f"❌ File scan failed: {e}")
@@ -1,7 +1,8 @@
 """Pydantic models for API requests and responses"""
 
+import numpy as np
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TypedDict
 from datetime import datetime
 
 
@@ -57,3 +58,34 @@ class SystemInfoResponse(BaseModel):
     data: Dict[str, Any]
     cache: Dict[str, Any]
     recommendations: Dict[str, Any]
+
+
+# Plain-dict response shapes for hot routes. These routes return
+# ORJSONResponse directly, so pydantic never walks the payload.
+
+
+class QueryResponseDict(TypedDict):
+    answer: str
+    matches: List[Dict[str, Any]]
+    metadata: Dict[str, Any]
+
+
+class EmbeddingResponseDict(TypedDict):
+    text: str
+    embedding: np.ndarray  # float32, serialized natively by ORJSONResponse
+    dimension: int
+    stored: bool
+
+
+class HealthResponseDict(TypedDict):
+    status: str
+    storage_mode: str
+    embedding_store: str
+    google_drive_sync: str
+    chunked_data_ready: bool
+    timestamp: str
+
+
+class DataStatsResponseDict(TypedDict):
+    total_chunks: int
+    law_type_breakdown: Dict[str, int]
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Header, HTTPException, Depends
+from collections import Counter
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
+from app.models.requests import DataStatsResponseDict
 from app.dependencies import (
-    get_bot_api_key,
+    verify_api_key,
     get_data_loader,
     get_app_config,
     scan_and_process_files,
@@ -10,51 +13,47 @@ from app.dependencies import (
 
 router = APIRouter()
 
+# Fields of /system/info that are fixed for the lifetime of the process
+_config = get_app_config()
+_SYSTEM_INFO_STATIC = {
+    "version": "2.0.0",
+    "storage_mode": _config.embedding_storage,
+    "debug": _config.debug,
+    "cache_enabled": _config.use_cache,
+}
 
-def verify_api_key(x_api_key: str = Header(None)):
-    """Verify API key"""
-    bot_api_key = get_bot_api_key()
-    if x_api_key != bot_api_key:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return x_api_key
 
-
-@router.get("/system/info")
+@router.get("/system/info", response_class=ORJSONResponse, response_model=None)
 async def system_info(_: str = Depends(verify_api_key)):
     """Get comprehensive system information"""
     data_loader = get_data_loader()
-    config = get_app_config()
     chunks = data_loader.load_all_chunks()
     chunked_ready = len(chunks) > 0
 
-    return {
-        "system": {
-            "version": "2.0.0",
-            "storage_mode": config.embedding_storage,
-            "debug": config.debug,
-            "cache_enabled": config.use_cache,
-            "chunked_data_ready": chunked_ready,
-        },
-        "data": {
-            "total_chunks": len(chunks),
-        },
-    }
+    return ORJSONResponse(
+        {
+            "system": {**_SYSTEM_INFO_STATIC, "chunked_data_ready": chunked_ready},
+            "data": {
+                "total_chunks": len(chunks),
+            },
+        }
+    )
 
 
-@router.get("/data/stats")
+@router.get("/data/stats", response_class=ORJSONResponse, response_model=None)
 async def data_stats(_: str = Depends(verify_api_key)):
     """Get detailed data statistics"""
     data_loader = get_data_loader()
-    chunks = data_loader.load_all_chunks()
-    law_type_stats = {}
-    for chunk in chunks:
-        law_type = chunk["metadata"].get("law_type", "Unknown")
-        law_type_stats[law_type] = law_type_stats.get(law_type, 0) + 1
+    law_type_stats = Counter(
+        chunk["metadata"].get("law_type", "Unknown")
+        for chunk in data_loader.iter_chunks()
+    )
 
-    return {
-        "total_chunks": len(chunks),
-        "law_type_breakdown": law_type_stats,
+    response: DataStatsResponseDict = {
+        "total_chunks": law_type_stats.total(),
+        "law_type_breakdown": dict(law_type_stats),
     }
+    return ORJSONResponse(response)
 
 
 @router.post("/data/reload")
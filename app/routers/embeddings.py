@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Header, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 from typing import Optional
 
 from app.dependencies import (
-    get_bot_api_key,
+    verify_api_key,
     get_embedding_stats,
+    is_document_text,
 )
 from utils.core.embed import clear_stored_embeddings
-from app.models.requests import EmbeddingRequest
+from app.models.requests import EmbeddingRequest, EmbeddingResponseDict
 from app.services.embedding_service import get_or_create_embedding
 from app.services.embedding_service import (
     debug_stored_embeddings,
@@ -18,34 +21,24 @@ from app.services.embedding_service import (
 router = APIRouter()
 
 
-def verify_api_key(
-    x_api_key: str = Header(None), bot_api_key: str = Depends(get_bot_api_key)
-):
-    if x_api_key != bot_api_key:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return x_api_key
-
-
-@router.post("/embeddings/create")
+@router.post("/embeddings/create", response_class=ORJSONResponse, response_model=None)
 async def create_embedding(request: EmbeddingRequest, _: str = Depends(verify_api_key)):
     # Only allow storing if store_key is provided AND text is not a question
-    is_document = (
-        bool(request.store_key)
-        and len(request.text) > 100
-        and not request.text.strip().endswith("?")
-    )
+    is_document = is_document_text(request.text, request.store_key)
     embedding = await get_or_create_embedding(
         request.text,
         use_storage=is_document,
         store_key=request.store_key if is_document else None,
     )
     logger.info(f"✅ Embedding created for text: '{request.text[:50]}...'")
-    return {
+    # Returning the response directly skips jsonable_encoder's per-float walk
+    response: EmbeddingResponseDict = {
         "text": request.text,
         "embedding": embedding,
-        "dimension": len(embedding) if embedding else 0,
+        "dimension": len(embedding),
         "stored": is_document,
     }
+    return ORJSONResponse(response)
 
 
 @router.get("/embeddings/stats")
@@ -59,7 +52,7 @@ async def clear_embeddings(
     file_path: Optional[str] = None, _: str = Depends(verify_api_key)
 ):
     """Clear stored embeddings"""
-    success = clear_stored_embeddings(file_path)
+    success = await asyncio.to_thread(clear_stored_embeddings, file_path)
     logger.info(f"✅ Embeddings cleared: {file_path or 'all'}")
     return {"success": success, "cleared": file_path if file_path else "all"}
 
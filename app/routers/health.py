@@ -1,7 +1,12 @@
+import asyncio
+import functools
+import time
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 from datetime import datetime
 
+from app.models.requests import HealthResponseDict
 from app.dependencies import (
     get_data_loader,
     get_embedding_store_instance,
@@ -12,28 +17,68 @@ from app.dependencies import (
 
 router = APIRouter()
 
+HEALTH_TTL = 1.0  # seconds
 
-@router.get("/health")
+# Fields of /health that are fixed for the lifetime of the process
+_HEALTH_STATIC = {"storage_mode": get_app_config().embedding_storage}
+
+
+def async_ttl_cache(ttl: float):
+    """Cache a zero-argument coroutine's result for ``ttl`` seconds.
+
+    Concurrent callers during a refresh wait on the same computation instead
+    of each running it. Exceptions are not cached.
+    """
+
+    def decorator(func):
+        lock = asyncio.Lock()
+        value = None
+        expiry = 0.0
+
+        @functools.wraps(func)
+        async def wrapper():
+            nonlocal value, expiry
+            if time.monotonic() < expiry:
+                return value
+            async with lock:
+                if time.monotonic() >= expiry:
+                    value = await func()
+                    expiry = time.monotonic() + ttl
+                return value
+
+        return wrapper
+
+    return decorator
+
+
+@async_ttl_cache(ttl=HEALTH_TTL)
+async def _compute_health() -> HealthResponseDict:
+    """Build the health payload (at most once per HEALTH_TTL)"""
+    data_loader = get_data_loader()
+    chunks_available = data_loader.has_chunks()
+
+    chunk_count = data_loader.count_chunks()
+    logger.info(
+        f"✅ Health check: {chunk_count if chunk_count is not None else 'unloaded'} chunks available"
+    )
+    embedding_store = get_embedding_store_instance()
+    drive_sync = get_drive_sync()
+
+    return {
+        "status": "healthy" if chunks_available else "degraded",
+        **_HEALTH_STATIC,
+        "embedding_store": "available" if embedding_store else "unavailable",
+        "google_drive_sync": "available" if drive_sync else "unavailable",
+        "chunked_data_ready": chunks_available,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@router.get("/health", response_class=ORJSONResponse, response_model=None)
 async def health_check():
     """Health check endpoint"""
     try:
-        data_loader = get_data_loader()
-        chunks = data_loader.load_all_chunks()
-        chunks_available = len(chunks) > 0
-
-        logger.info(f"✅ Health check: {len(chunks)} chunks available")
-        embedding_store = get_embedding_store_instance()
-        drive_sync = get_drive_sync()
-        config = get_app_config()
-
-        return {
-            "status": "healthy" if chunks_available else "degraded",
-            "storage_mode": config.embedding_storage,
-            "embedding_store": "available" if embedding_store else "unavailable",
-            "google_drive_sync": "available" if drive_sync else "unavailable",
-            "chunked_data_ready": chunks_available,
-            "timestamp": datetime.now().isoformat(),
-        }
+        return ORJSONResponse(await _compute_health())
 
     except Exception as e:
         logger.error(f"❌ Health check failed: {e}")
@@ -1,25 +1,18 @@
 """Query-related API endpoints"""
 
-from fastapi import APIRouter, Header, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 from loguru import logger
 
-from app.models.requests import QueryRequest, QueryResponse
+from app.models.requests import QueryRequest, QueryResponseDict
 from app.services.query_service import QueryService
-from app.dependencies import get_bot_api_key
+from app.dependencies import verify_api_key
 
 router = APIRouter()
 
 
-def verify_api_key(x_api_key: str = Header(None)):
-    """Verify API key"""
-    bot_api_key = get_bot_api_key()
-    if x_api_key != bot_api_key:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return x_api_key
-
-
-@router.post("/ask", response_model=QueryResponse)
+@router.post("/ask", response_class=ORJSONResponse, response_model=None)
 async def ask_question(request: QueryRequest, _: str = Depends(verify_api_key)):
     """Ask a question using the Legal RAG system"""
     start_time = datetime.now()
@@ -28,9 +21,11 @@ async def ask_question(request: QueryRequest, _: str = Depends(verify_api_key)):
         logger.info(f"🤔 Question received: '{request.question}'")
 
         query_service = QueryService()
-        result = await query_service.process_query(request.question, start_time)
+        result: QueryResponseDict = await query_service.process_query(
+            request.question, start_time
+        )
 
-        return result
+        return ORJSONResponse(result)
 
     except Exception as e:
         logger.error(f"❌ Unexpected error in ask endpoint: {e}")
@@ -1,22 +1,14 @@
-from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from loguru import logger
 from typing import Optional
 
 from app.models.requests import SyncRequest
 from app.services.sync_service import sync_drive_background
-from app.dependencies import get_bot_api_key, get_drive_sync
+from app.dependencies import get_drive_sync, verify_api_key
 
 router = APIRouter()
 
 
-def verify_api_key(x_api_key: str = Header(None)):
-    """Verify API key"""
-    bot_api_key = get_bot_api_key()
-    if x_api_key != bot_api_key:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return x_api_key
-
-
 @router.post("/sync/drive")
 async def sync_google_drive(
     request: SyncRequest,
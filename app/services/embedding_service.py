@@ -1,8 +1,9 @@
 import asyncio
 import concurrent.futures
+import os
 import numpy as np
 from loguru import logger
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Optional
 
 from app.dependencies import (
     get_app_config,
@@ -12,8 +13,16 @@ from app.dependencies import (
     search_stored_embeddings_async,
     embed_text_async,
     get_supabase_client,
-    generate_query_hash,
+    compute_query_ctx,
+    get_pdf_pool,
+    is_document_text,
 )
+from utils.core.cache import (
+    get_cached_match,
+    match_cache_generation,
+    set_cached_match,
+)
+from utils.data.local_embedding_store import LocalEmbeddingStore
 
 # Initialize dependencies
 config = get_app_config()
@@ -21,47 +30,102 @@ data_loader = get_data_loader()
 embedding_store = get_embedding_store_instance()
 supabase = get_supabase_client()
 
+# Batches buffered between stages of the reindexing pipeline
+PIPELINE_QUEUE_SIZE = 4
+# PDFs being chunked (or chunked and waiting for the embed stage) at once:
+# enough to keep every PDF pool worker busy
+PIPELINE_CHUNK_JOBS = os.cpu_count() or 1
+
+# Local stores up to this many rows are searched directly on the event loop
+INLINE_SEARCH_MAX_ROWS = 4096
+
+# Shared by every request: search threads are reused instead of spawned per call
+_SEARCH_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 2), thread_name_prefix="search"
+)
+
 
 async def get_or_create_embedding(
     text: str, use_storage: bool = True, store_key: Optional[str] = None
-) -> List[float]:
+) -> np.ndarray:
     """Get or create embedding with storage only (no cache)"""
 
-    # 1. Check persistent store
+    # 1. Check persistent store (already stored, so embed once without storing
+    # and search with that vector rather than embedding the text again)
     if use_storage and embedding_store:
-        query_hash = generate_query_hash(text)
-        if check_embeddings_exist(query_hash):
+        query_ctx = compute_query_ctx(text)
+        if check_embeddings_exist(query_ctx.digest):
+            embedding = await embed_text_async(text)
             stored_results = await search_stored_embeddings_async(
-                text, top_k=1, threshold=0.99
+                embedding, top_k=1, threshold=0.99
             )
             if stored_results:
-                embedding = stored_results[0].get("embedding")
-                if embedding:
-                    return embedding
+                stored = stored_results[0].get("embedding")
+                if stored is not None and len(stored):
+                    return np.asarray(stored, dtype=np.float32)
+            return embedding
+
+    # 2. Generate new embedding, storing it in the same call only if this is
+    # a document (not a question)
+    is_document = is_document_text(text, store_key)
+    return await embed_text_async(
+        text, store_key if is_document else None, store=is_document and use_storage
+    )
 
-    # 2. Generate new embedding
-    # Only allow storing if this is a document (not a question)
-    is_document = bool(store_key) and len(text) > 100 and not text.strip().endswith("?")
-    embedding = await embed_text_async(text)
 
-    if embedding:
-        # Only store if is_document
-        if is_document and use_storage:
-            # Re-embed with store_key to trigger storage if needed
-            await embed_text_async(text, store_key or "")
-    return embedding or []
+def _search_off_loop(store) -> bool:
+    """Whether a search does network I/O or scans enough rows to block the loop"""
+    local_store = getattr(store, "local_store", store)
+    if not isinstance(local_store, LocalEmbeddingStore):
+        return True
+    return local_store.row_count() > INLINE_SEARCH_MAX_ROWS
 
 
-async def fetch_matches(embedding: List[float]) -> Dict[str, Any]:
+async def fetch_matches(embedding: np.ndarray) -> Dict[str, Any]:
     """Hybrid approach to find matching documents"""
-    loop = asyncio.get_running_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        return await loop.run_in_executor(pool, _search_hybrid, embedding)
+    embedding = np.asarray(embedding, dtype=np.float32)
+
+    # Repeat questions skip the search entirely (Redis round trips run in a
+    # thread so a slow or unreachable server never stalls the event loop)
+    if config.use_cache:
+        cached = await asyncio.to_thread(get_cached_match, embedding)
+        if cached is not None:
+            return {
+                "embedding_matches": cached,
+                "total_matches": len(cached),
+                "search_method": "documents_only",
+                "source": "cache",
+            }
+
+    generation = match_cache_generation()
+    # A small in-memory search takes microseconds: cheaper than a thread hop.
+    # It never waits on the loop, though: while a write (and its disk I/O)
+    # holds the store, the search goes to a thread instead
+    results = None
+    store = embedding_store or get_embedding_store_instance()
+    if not _search_off_loop(store):
+        local_store = getattr(store, "local_store", store)
+        results = _search_hybrid(embedding, local_store.try_search_embeddings)
+    if results is None:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(_SEARCH_POOL, _search_hybrid, embedding)
+
+    # Failed searches are not cached
+    if config.use_cache and "error" not in results:
+        await asyncio.to_thread(
+            set_cached_match, embedding, results["embedding_matches"], generation
+        )
+    return results
 
 
-def _search_hybrid(embedding: List[float]) -> Dict[str, Any]:
+def _search_hybrid(
+    embedding: np.ndarray, search: Optional[Callable[..., Any]] = None
+) -> Optional[Dict[str, Any]]:
     """
     SIMPLE FIX: Only search document content, ignore user questions
+
+    ``search`` replaces store.search_embeddings; if it returns None (store
+    busy) so does this, without logging or caching anything
     """
     results = {
         "embedding_matches": [],
@@ -70,49 +134,33 @@ def _search_hybrid(embedding: List[float]) -> Dict[str, Any]:
     }
 
     try:
-        # Get your existing embedding store
-        embedding_store = get_embedding_store_instance()
-        if not embedding_store:
+        # Use the store bound at import; only look it up again if that failed
+        store = embedding_store or get_embedding_store_instance()
+        if not store:
             logger.error("❌ No embedding store available")
+            results["error"] = "No embedding store available"
             return results
 
-        # Debug: Print number of embeddings in the store (if possible)
-        try:
-            stats = embedding_store.get_embedding_stats()
-            logger.info(f"[DEBUG] Embedding store stats: {stats}")
-        except Exception as e:
-            logger.warning(f"[DEBUG] Could not get embedding stats: {e}")
-
-        # Search with lower threshold
-        all_matches = embedding_store.search_embeddings(
-            np.array(embedding),
+        # Search with lower threshold, skipping stored user questions
+        # (store_key present AND content is short AND ends with '?') and empty chunks
+        all_matches = (search or store.search_embeddings)(
+            embedding,
             top_k=20,
             threshold=0.3,  # Lower threshold for more matches
+            exclude_questions=True,
         )
+        if all_matches is None:
+            return None
 
-        # Debug: Print number of matches before filtering
-        logger.info(f"[DEBUG] Raw matches found: {len(all_matches)}")
+        # Debug: Print number of matches after filtering
+        logger.info(f"[DEBUG] Document matches found: {len(all_matches)}")
         for i, match in enumerate(all_matches[:5]):
             sim = match.get("similarity", None)
             content = match.get("content", "")
             logger.info(f"[DEBUG] Match {i+1}: sim={sim}, preview='{content[:80]}'")
 
-        # Improved filter: Only skip if it is a user question (store_key present AND content is short AND ends with '?')
-        document_matches = []
-        for match in all_matches:
-            content = match.get("content", "").strip()
-            store_key = match.get("metadata", {}).get("store_key")
-            # Only skip if store_key is present AND content is short AND ends with '?'
-            if store_key and len(content) < 100 and content.endswith("?"):
-                continue
-            # Skip if content is empty
-            if not content:
-                continue
-            # This is actual document content - keep it
-            document_matches.append(match)
-            # Stop when we have enough good matches
-            if len(document_matches) >= 10:
-                break
+        # Stop when we have enough good matches
+        document_matches = all_matches[:10]
 
         results["embedding_matches"] = document_matches
         results["total_matches"] = len(document_matches)
@@ -125,6 +173,7 @@ def _search_hybrid(embedding: List[float]) -> Dict[str, Any]:
 
     except Exception as e:
         logger.error(f"❌ Search failed: {e}")
+        results["error"] = str(e)
         return results
 
 
@@ -183,26 +232,77 @@ async def debug_stored_embeddings():
 
 # Add proper document indexing method
 async def index_documents_properly():
-    from datetime import datetime
-    from utils.processing.chunker import PDFProcessor
-    import os
+    from utils.processing.chunker import PDFProcessor, chunk_pdf_worker
 
     """Properly index your documents for RAG"""
     try:
         logger.info("🔄 Starting proper document indexing from raw PDFs...")
 
-        # Re-chunk and re-embed all PDFs, forcing overwrite
+        # Chunk -> embed -> store pipeline: each stage works on the next files
+        # while the following stage handles earlier ones. A file holds a
+        # chunking slot until its chunks are queued, so with the bounded
+        # queues chunking is held back when embedding falls behind
         processor = PDFProcessor()
-        processor.process_all_pdfs(force=True)
+        pdf_files = sorted(processor.source_dir.glob("*.pdf"))
+        loop = asyncio.get_running_loop()
+        pool = get_pdf_pool()
+        embed_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        store_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        chunk_slots = asyncio.Semaphore(PIPELINE_CHUNK_JOBS)
+
+        async def chunk_one(pdf_file):
+            async with chunk_slots:
+                try:
+                    # Re-chunk, forcing overwrite
+                    chunks = await loop.run_in_executor(
+                        pool, chunk_pdf_worker, str(pdf_file), True
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Failed to chunk {pdf_file.name}: {e}")
+                    chunks = None
+                await embed_queue.put((pdf_file, chunks))
+
+        async def chunk_stage():
+            await asyncio.gather(*(chunk_one(pdf_file) for pdf_file in pdf_files))
+            await embed_queue.put(None)
+
+        async def embed_stage():
+            done = False
+            while not done:
+                item = await embed_queue.get()
+                if item is None:
+                    break
+                # Embed every file already waiting in one batched call
+                chunk_sets = [item]
+                while not embed_queue.empty():
+                    item = embed_queue.get_nowait()
+                    if item is None:
+                        done = True
+                        break
+                    chunk_sets.append(item)
+                await store_queue.put(
+                    await asyncio.to_thread(processor.embed_chunk_sets, chunk_sets)
+                )
+            await store_queue.put(None)
+
+        async def store_stage():
+            # One writer: the store rewrites its files on every write
+            while (embedded_sets := await store_queue.get()) is not None:
+                await asyncio.to_thread(processor.store_chunk_sets, embedded_sets)
 
-        # Optionally, reload chunks to report stats
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(chunk_stage())
+            tg.create_task(embed_stage())
+            tg.create_task(store_stage())
+
+        # Count the new chunks by streaming the files; they are reloaded lazily
         data_loader._chunks = None
-        chunks = data_loader.load_all_chunks()
-        logger.info(f"📚 Re-chunked and indexed {len(chunks)} chunks from PDFs")
+        indexed_count = sum(1 for _ in data_loader.iter_chunks())
+        logger.info(f"📚 Re-chunked and indexed {indexed_count} chunks from PDFs")
 
         return {
             "success": True,
-            "indexed_count": len(chunks),
+            "indexed_count": indexed_count,
             "source": "raw_pdfs",
         }
     except Exception as e:
@@ -210,6 +310,32 @@ async def index_documents_properly():
         return {"error": str(e)}
 
 
+SYNC_CONCURRENCY = 8  # Files uploaded to the remote store at once
+
+
+async def _sync_file(db_store, file_path, meta, chunks, embeddings, semaphore) -> str:
+    """Upload one file's embeddings unless the remote store already has them"""
+    async with semaphore:
+        try:
+            logger.debug("[SYNC] Checking if {} exists in remote DB...", file_path)
+            if await asyncio.to_thread(db_store.embedding_exists, file_path):
+                logger.debug("[SYNC] Skipping {} (already synced)", file_path)
+                return "already_synced"
+
+            logger.debug("[SYNC] Syncing {}...", file_path)
+            success = await asyncio.to_thread(
+                db_store.store_embeddings, embeddings, chunks, meta
+            )
+            if success:
+                logger.debug("[SYNC] Synced {} successfully.", file_path)
+                return "synced"
+            logger.debug("[SYNC] Failed to sync {}.", file_path)
+            return "failed"
+        except Exception as e:
+            logger.error(f"❌ Failed to sync {file_path}: {e}")
+            return "failed"
+
+
 async def sync_embeddings():
     """Synchronize all local embeddings to the remote database (if in sync/database mode)"""
     from utils.data.local_embedding_store import LocalEmbeddingStore
@@ -240,36 +366,18 @@ async def sync_embeddings():
     else:
         return {"error": "Unknown embedding store type"}
 
-    synced = 0
-    failed = 0
-    already_synced = 0
-
-    # Iterate over all local chunks/embeddings
-    for file_path, meta in local_store.metadata.items():
-        print(f"[SYNC] Checking if {file_path} exists in remote DB...")
-        exists = db_store.embedding_exists(file_path)
-        print(f"[SYNC] Exists? {exists}")
-        if exists:
-            print(f"[SYNC] Skipping {file_path} (already synced)")
-            already_synced += 1
-            continue
-        # Try to upload
-        try:
-            print(f"[SYNC] Syncing {file_path}...")
-            start_idx = meta["start_idx"]
-            end_idx = meta["end_idx"]
-            chunks = [c for c in local_store.chunks if c.get("file_path") == file_path]
-            embeddings = local_store.embeddings[start_idx : end_idx + 1]
-            success = db_store.store_embeddings(embeddings, chunks, meta)
-            if success:
-                print(f"[SYNC] Synced {file_path} successfully.")
-                synced += 1
-            else:
-                print(f"[SYNC] Failed to sync {file_path}.")
-                failed += 1
-        except Exception as e:
-            failed += 1
-            logger.error(f"❌ Failed to sync {file_path}: {e}")
+    # Upload files concurrently (network-bound), at most SYNC_CONCURRENCY at a time
+    semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+    outcomes = await asyncio.gather(
+        *[
+            _sync_file(db_store, file_path, meta, chunks, embeddings, semaphore)
+            for file_path, meta, chunks, embeddings in local_store.file_slices()
+        ]
+    )
+
+    synced = outcomes.count("synced")
+    failed = outcomes.count("failed")
+    already_synced = outcomes.count("already_synced")
 
     return {
         "synced": synced,
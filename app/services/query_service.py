@@ -1,10 +1,11 @@
 """Query service containing business logic for question answering"""
 
 import asyncio
-import concurrent.futures
-import hashlib
+import re
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Any
+import numpy as np
 from loguru import logger
 
 from utils.core.embed import (
@@ -12,10 +13,41 @@ from utils.core.embed import (
     check_embeddings_exist,
     search_stored_embeddings_async,
 )
+from utils.core.cache import get_cached_embedding, set_cached_embedding
 from utils.core.llm import ask_llm
 from utils.core.config import get_config, is_local_storage, is_database_storage
-from app.dependencies import get_data_loader, get_embedding_store_instance
-from app.services.embedding_service import _search_hybrid
+from app.dependencies import (
+    get_data_loader,
+    get_embedding_store_instance,
+    generate_query_hash,
+    compute_query_ctx,
+    get_semantic_cache,
+)
+from app.services.embedding_service import fetch_matches
+
+MAX_CHUNKS = 4  # Limit to top N chunks to avoid LLM token overflow
+MAX_WORDS_PER_CHUNK = 500  # Truncate each chunk for safety
+
+
+_WORD = re.compile(r"\S+")
+
+
+def truncate(text: str, max_words: int = MAX_WORDS_PER_CHUNK) -> str:
+    """
+    First max_words words of text, sliced at the last word's end: the scan
+    stops there and no per-word strings are built
+    """
+    last_word = next(islice(_WORD.finditer(text), max_words - 1, None), None)
+    if last_word is None:
+        return text.strip()
+    return text[: last_word.end()].lstrip()
+
+
+def build_context(document_matches: List[Dict[str, Any]]) -> str:
+    """Join the truncated contents of the top MAX_CHUNKS matches in one pass"""
+    return "\n\n".join(
+        truncate(doc["content"]) for doc in islice(document_matches, MAX_CHUNKS)
+    )
 
 
 class QueryService:
@@ -26,7 +58,7 @@ class QueryService:
 
     def generate_query_hash(self, question: str) -> str:
         """Generate a unique hash for a query to use as storage key"""
-        return hashlib.md5(question.encode()).hexdigest()
+        return generate_query_hash(question)
 
     def get_llm_model_info(self) -> Dict[str, Any]:
         """Get information about the LLM model being used"""
@@ -38,43 +70,55 @@ class QueryService:
 
     async def get_or_create_embedding(
         self, question: str, use_storage: bool = True
-    ) -> List[float]:
-        """Get embedding from storage or create new one (no cache)"""
+    ) -> np.ndarray:
+        """Get embedding from storage or cache, or create a new one"""
         try:
             # 1. Check storage if enabled (should only be True for document ingestion, not user queries)
             if use_storage and self.embedding_store:
-                query_hash = self.generate_query_hash(question)
-                if check_embeddings_exist(query_hash):
+                query_ctx = compute_query_ctx(question)
+                if check_embeddings_exist(query_ctx.digest):
                     logger.info("✅ Found embedding in storage")
+                    # Embed once and search with the vector (searching with the
+                    # text would run the model a second time)
+                    embedding = await embed_text_async(question, None)
                     stored_results = await search_stored_embeddings_async(
-                        question, top_k=1, threshold=0.99
+                        embedding, top_k=1, threshold=0.99
                     )
                     if stored_results:
-                        embedding = stored_results[0].get("embedding")
-                        if embedding:
-                            return embedding
-
-            # 2. Generate new embedding
+                        stored = stored_results[0].get("embedding")
+                        if stored is not None and len(stored):
+                            return np.asarray(stored, dtype=np.float32)
+                    return embedding
+
+            # 2. Reuse the embedding of a repeated question
+            # (Redis round trips run in a thread so they never stall the loop)
+            if self.config.use_cache:
+                cached = await asyncio.to_thread(get_cached_embedding, question)
+                if cached is not None:
+                    logger.info("✅ Found embedding in cache")
+                    return cached
+
+            # 3. Generate new embedding
             logger.info("🔄 Generating new embedding")
             # For user questions, do NOT store the embedding persistently
             embedding = await embed_text_async(
                 question, None
             )  # store_key=None disables storage
 
-            if embedding:
+            if len(embedding):
                 logger.info("✅ New embedding generated")
+                if self.config.use_cache:
+                    await asyncio.to_thread(set_cached_embedding, question, embedding)
 
             return embedding
 
         except Exception as e:
             logger.error(f"❌ Error getting/creating embedding: {e}")
-            return []
+            return np.empty(0, dtype=np.float32)
 
-    async def fetch_matches(self, embedding: List[float]) -> Dict[str, Any]:
+    async def fetch_matches(self, embedding: np.ndarray) -> Dict[str, Any]:
         """Fetch matches using hybrid approach"""
-        loop = asyncio.get_running_loop()
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            return await loop.run_in_executor(pool, _search_hybrid, embedding)
+        return await fetch_matches(embedding)
 
     async def process_query(
         self, question: str, start_time: datetime
@@ -82,9 +126,24 @@ class QueryService:
         """Process a query and return the response"""
         # Get or create embedding
         embedding = await self.get_or_create_embedding(question, use_storage=True)
-        if not embedding:
+        if not len(embedding):
             raise Exception("Failed to generate embedding")
 
+        # Reuse the answer of a near-identical recent question
+        semantic_cache = get_semantic_cache() if self.config.use_cache else None
+        cached = semantic_cache.lookup(embedding) if semantic_cache else None
+        if cached is not None:
+            logger.info("✅ Answer served from semantic cache")
+            return {
+                **cached,
+                "metadata": {
+                    **cached["metadata"],
+                    "embedding_source": "semantic_cache",
+                    "duration_seconds": (datetime.now() - start_time).total_seconds(),
+                    "timestamp": start_time.isoformat(),
+                },
+            }
+
         # Fetch matches
         response = await self.fetch_matches(embedding)
         matches = response.get("embedding_matches", [])
@@ -108,17 +167,9 @@ class QueryService:
             }
 
         # Proceed using filtered document matches only
-        MAX_CHUNKS = 4  # Limit to top N chunks to avoid LLM token overflow
-        MAX_WORDS_PER_CHUNK = 500  # Truncate each chunk for safety
-
-        def truncate(text, max_words=MAX_WORDS_PER_CHUNK):
-            words = text.split()
-            return " ".join(words[:max_words])
-
-        document_matches = document_matches[:MAX_CHUNKS]
-        context = "\n\n".join([truncate(doc["content"]) for doc in document_matches])
+        context = build_context(document_matches)
         logger.info(
-            f"🤖 Sending query to LLM with {len(document_matches)} context chunks (max {MAX_WORDS_PER_CHUNK} words each)"
+            f"🤖 Sending query to LLM with {min(len(document_matches), MAX_CHUNKS)} context chunks (max {MAX_WORDS_PER_CHUNK} words each)"
         )
         answer = await ask_llm(context, question)
 
@@ -129,7 +180,7 @@ class QueryService:
 
         logger.info(f"✅ Question answered in {duration:.2f}s using {matches_source}")
 
-        return {
+        result = {
             "answer": answer,
             "matches": matches,
             "metadata": {
@@ -142,6 +193,9 @@ class QueryService:
                 "timestamp": start_time.isoformat(),
             },
         }
+        if semantic_cache:
+            semantic_cache.add(embedding, result)
+        return result
 
     async def test_embedding_pipeline(self, text: str) -> Dict[str, Any]:
         """Test the embedding pipeline with sample text"""
@@ -149,7 +203,7 @@ class QueryService:
 
         # Test embedding creation
         embedding = await self.get_or_create_embedding(text, use_storage=True)
-        if not embedding:
+        if not len(embedding):
             raise Exception("Failed to create embedding")
 
         # Test search
@@ -1,4 +1,4 @@
-import json
+import orjson
 from pathlib import Path
 from loguru import logger
 
@@ -44,8 +44,7 @@ class SyncService:
                         chunk["metadata"] = metadata
 
                     output_path = self.chunked_data_dir / f"{file_path.stem}.json"
-                    with open(output_path, "w") as f:
-                        json.dump(chunks, f)
+                    output_path.write_bytes(orjson.dumps(chunks))
                     logger.info(f"✅ Processed {file_name} -> {len(chunks)} chunks")
             except Exception as e:
                 logger.error(f"❌ Failed to process {file_name}: {e}")
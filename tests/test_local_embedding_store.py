@@ -0,0 +1,184 @@
+"""On-disk format of LocalEmbeddingStore: in-place appends, reloads and legacy migration"""
+import pickle
+
+import numpy as np
+import orjson
+import pytest
+
+from utils.data.local_embedding_store import (
+    LocalEmbeddingStore,
+    _append_npy,
+    _json_lines,
+    _load_json_lines,
+)
+
+DIM = 8
+
+
+def _rows(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _unit(rows):
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _chunks(prefix, n):
+    return [{"id": f"{prefix}-{i}", "content": f"{prefix} chunk {i}", "metadata": {}} for i in range(n)]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return tmp_path / "embeddings"
+
+
+def _open(store_path):
+    return LocalEmbeddingStore({"path": str(store_path)})
+
+
+def test_append_npy_extends_file_in_place(tmp_path):
+    path = tmp_path / "rows.npy"
+    first, second = _rows(3), _rows(2, seed=1)
+    np.save(path, first)
+
+    assert _append_npy(path, second, saved=3)
+    np.testing.assert_array_equal(np.load(path), np.concatenate([first, second]))
+
+
+def test_append_npy_refuses_file_with_other_row_count(tmp_path):
+    path = tmp_path / "rows.npy"
+    np.save(path, _rows(3))
+    before = path.read_bytes()
+
+    assert not _append_npy(path, _rows(2, seed=1), saved=4)
+    assert not _append_npy(path, _rows(2, seed=1).astype(np.float64), saved=3)
+    assert path.read_bytes() == before
+
+
+def test_append_npy_drops_torn_earlier_append(tmp_path):
+    path = tmp_path / "rows.npy"
+    first, second = _rows(3), _rows(2, seed=1)
+    np.save(path, first)
+    # Rows written past the data whose header update never happened
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (DIM * 4 + 5))
+
+    assert _append_npy(path, second, saved=3)
+    np.testing.assert_array_equal(np.load(path), np.concatenate([first, second]))
+
+
+def test_appended_rows_survive_reload(store_path):
+    first, second = _rows(4), _rows(3, seed=1)
+    store = _open(store_path)
+    assert store.store_embeddings(first, _chunks("a", 4), {"file_path": "a.json"})
+
+    inode = (store_path / "embeddings.npy").stat().st_ino
+    store = _open(store_path)
+    assert store.store_embeddings(second, _chunks("b", 3), {"file_path": "b.json"})
+    # The second save appended to the file instead of replacing it
+    assert (store_path / "embeddings.npy").stat().st_ino == inode
+
+    reloaded = _open(store_path)
+    np.testing.assert_allclose(
+        reloaded.embeddings, _unit(np.concatenate([first, second])), atol=1e-6
+    )
+    assert [c["id"] for c in reloaded.chunks] == [c["id"] for c in _chunks("a", 4) + _chunks("b", 3)]
+    assert reloaded.metadata["b.json"]["start_idx"] == 4
+
+
+def test_replaced_file_is_rewritten_consistently(store_path):
+    store = _open(store_path)
+    store.store_embeddings(_rows(4), _chunks("a", 4), {"file_path": "a.json"})
+    store.store_embeddings(_rows(3, seed=1), _chunks("b", 3), {"file_path": "b.json"})
+    replacement = _rows(2, seed=2)
+    store.store_embeddings(replacement, _chunks("a2", 2), {"file_path": "a.json"})
+
+    reloaded = _open(store_path)
+    assert reloaded.row_count() == len(reloaded.chunks) == 5
+    meta = reloaded.metadata["a.json"]
+    np.testing.assert_allclose(
+        reloaded.embeddings[meta["start_idx"] : meta["end_idx"] + 1], _unit(replacement), atol=1e-6
+    )
+
+
+def test_legacy_pickle_is_migrated_to_npy(store_path):
+    store_path.mkdir(parents=True)
+    legacy = _unit(_rows(3))
+    with open(store_path / "embeddings.pkl", "wb") as f:
+        pickle.dump(list(legacy), f)
+
+    store = _open(store_path)
+
+    assert (store_path / "embeddings.npy").exists()
+    np.testing.assert_allclose(store.embeddings, legacy, atol=1e-6)
+    np.testing.assert_allclose(np.load(store_path / "embeddings.npy"), legacy, atol=1e-6)
+
+
+def test_json_lines_round_trip_with_newlines_in_content():
+    records = [{"content": "line one\nline two"}, {"content": "third", "n": 3}]
+    assert _load_json_lines(_json_lines(records)) == records
+
+
+def test_load_json_lines_drops_torn_last_line():
+    data = _json_lines([{"id": 1}, {"id": 2}]) + b'{"id": 3, "cont'
+    assert _load_json_lines(data) == [{"id": 1}, {"id": 2}]
+
+
+def test_new_chunks_are_appended_as_lines(store_path):
+    store = _open(store_path)
+    store.store_embeddings(_rows(2), _chunks("a", 2), {"file_path": "a.json"})
+    inode = (store_path / "chunks.jsonl").stat().st_ino
+    store.store_embeddings(_rows(3, seed=1), _chunks("b", 3), {"file_path": "b.json"})
+
+    chunks_file = store_path / "chunks.jsonl"
+    assert chunks_file.stat().st_ino == inode
+    lines = chunks_file.read_bytes().splitlines()
+    assert [orjson.loads(line)["id"] for line in lines] == ["a-0", "a-1", "b-0", "b-1", "b-2"]
+
+
+def test_removal_rewrites_chunks_without_duplicates(store_path):
+    store = _open(store_path)
+    store.store_embeddings(_rows(2), _chunks("a", 2), {"file_path": "a.json"})
+    store.store_embeddings(_rows(3, seed=1), _chunks("b", 3), {"file_path": "b.json"})
+    assert store.clear_embeddings("a.json")
+    store.store_embeddings(_rows(1, seed=2), _chunks("c", 1), {"file_path": "c.json"})
+
+    reloaded = _open(store_path)
+    assert [c["id"] for c in reloaded.chunks] == ["b-0", "b-1", "b-2", "c-0"]
+    assert reloaded.row_count() == 4
+    assert reloaded.metadata["c.json"]["start_idx"] == 3
+
+
+def test_torn_chunk_line_is_dropped_and_file_repaired(store_path):
+    store = _open(store_path)
+    store.store_embeddings(_rows(2), _chunks("a", 2), {"file_path": "a.json"})
+    with open(store_path / "chunks.jsonl", "ab") as f:
+        f.write(b'{"id": "torn", "cont')
+
+    store = _open(store_path)
+    assert [c["id"] for c in store.chunks] == ["a-0", "a-1"]
+    store.store_embeddings(_rows(1, seed=1), _chunks("b", 1), {"file_path": "b.json"})
+
+    # The next save rewrote the file instead of appending after the torn line
+    lines = (store_path / "chunks.jsonl").read_bytes().splitlines()
+    assert [orjson.loads(line)["id"] for line in lines] == ["a-0", "a-1", "b-0"]
+
+
+def test_legacy_chunks_json_is_migrated_on_save(store_path):
+    store_path.mkdir(parents=True)
+    np.save(store_path / "embeddings.npy", _unit(_rows(2)))
+    legacy = [dict(chunk, file_path="a.json", embedding_idx=i) for i, chunk in enumerate(_chunks("a", 2))]
+    (store_path / "chunks.json").write_bytes(orjson.dumps(legacy))
+    (store_path / "metadata.json").write_bytes(
+        orjson.dumps({"a.json": {"chunk_count": 2, "start_idx": 0, "end_idx": 1}})
+    )
+
+    store = _open(store_path)
+    assert [c["id"] for c in store.chunks] == ["a-0", "a-1"]
+    assert all("embedding_idx" not in c for c in store.chunks)
+    store.store_embeddings(_rows(1, seed=1), _chunks("b", 1), {"file_path": "b.json"})
+
+    assert not (store_path / "chunks.json").exists()
+    reloaded = _open(store_path)
+    assert [c["id"] for c in reloaded.chunks] == ["a-0", "a-1", "b-0"]
+    assert reloaded.row_count() == 3
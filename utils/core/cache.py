@@ -1,50 +1,186 @@
 import hashlib
 import json
 import os
-from typing import Any, List, Optional
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Union
 
+import numpy as np
 import redis
 from loguru import logger
 
+from utils.core.semantic_cache import invalidate_semantic_caches
+from utils.data.local_embedding_store import quantize_int8
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Connection pool settings: bounded connections shared by all request threads,
+# with TCP keepalive so idle connections aren't silently dropped by the network
+REDIS_MAX_CONNECTIONS = 64
+REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds
+REDIS_KEEPALIVE_OPTIONS = {
+    option: value
+    for option, value in (
+        (getattr(socket, "TCP_KEEPIDLE", None), 30),
+        (getattr(socket, "TCP_KEEPINTVL", None), 10),
+        (getattr(socket, "TCP_KEEPCNT", None), 3),
+    )
+    if option is not None
+}
+
+
+def _redis_client(url: Optional[str], decode_responses: bool) -> redis.Redis:
+    """Client backed by its own explicitly sized connection pool"""
+    pool_kwargs = dict(
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_keepalive=True,
+        socket_keepalive_options=REDIS_KEEPALIVE_OPTIONS,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=decode_responses,
+    )
+    if url:
+        pool = redis.ConnectionPool.from_url(url, **pool_kwargs)
+    else:
+        pool = redis.ConnectionPool(host="localhost", port=6379, db=0, **pool_kwargs)
+    return redis.Redis(connection_pool=pool)
+
+
 # Redis connection with fallback to local development
 try:
     REDIS_URL = os.getenv("REDIS_URL")
+    redis_client = _redis_client(REDIS_URL, decode_responses=True)
+    # Raw bytes client for float32 embeddings
+    redis_client_bin = _redis_client(REDIS_URL, decode_responses=False)
+
+    # Test the connection
+    redis_client.ping()
     if REDIS_URL:
         # Production Redis (from Redis Cloud, Railway, etc.)
-        redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
         logger.info("✅ Connected to Redis Cloud")
     else:
         # Local Redis for development
-        redis_client = redis.Redis(
-            host="localhost", port=6379, db=0, decode_responses=True
-        )
         logger.info("✅ Connected to local Redis")
 
-    # Test the connection
-    redis_client.ping()
-
 except Exception as e:
     logger.error(f"❌ Redis connection failed: {e}")
     logger.info("📋 Falling back to in-memory cache")
     redis_client = None
-
-# In-memory fallback cache
-memory_cache = {}
+    redis_client_bin = None
 
 # Cache TTL settings (in seconds)
 EMBEDDING_TTL = 24 * 60 * 60  # 24 hours
 MATCH_TTL = 60 * 60  # 1 hour
 
+# Keys fetched per SCAN call / deleted per pipeline flush in clear_cache
+SCAN_BATCH_SIZE = 1000
+
+# Entries kept by the in-memory fallback before evicting the least recently used
+MEMORY_CACHE_SIZE = 10_000
+
+# Bumped whenever cached search results are dropped, so a search that started
+# before a store write doesn't cache its (stale) results afterwards
+_match_generation = 0
+
+
+class MemoryCache:
+    """Thread-safe LRU with per-entry TTL, used when Redis is unavailable"""
+
+    def __init__(self, maxsize: int = MEMORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expiry, value = entry
+            if expiry < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# In-memory fallback cache
+memory_cache = MemoryCache()
+
 
-def get_cached_embedding(text: str) -> Optional[List[float]]:
+def _pack_embedding(embedding: Union[List[float], np.ndarray]) -> bytes:
+    """
+    int8-quantized embedding bytes: a float32 scale followed by one byte per
+    dimension (a quarter of raw float32, no JSON)
+    """
+    quantized, scales = quantize_int8(np.asarray(embedding, dtype=np.float32))
+    return scales.tobytes() + quantized.tobytes()
+
+
+def _unpack_embedding(raw: Optional[bytes]) -> Optional[np.ndarray]:
+    """Unit-length float32 embedding from _pack_embedding bytes"""
+    if not raw:
+        return None
+    scale = np.frombuffer(raw, dtype=np.float32, count=1)[0]
+    vector = np.frombuffer(raw, dtype=np.int8, offset=4).astype(np.float32) * scale
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _digest(data: bytes) -> str:
+    """128-bit hex digest for cache keys (xxh3 when available, no crypto needed)"""
+    if xxhash is not None:
+        return xxhash.xxh3_128(data).hexdigest()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _text_key(text: str) -> str:
+    """
+    Fixed-size cache key for text: case and whitespace are normalized so
+    trivially different spellings of a question share an entry.
+    """
+    # "i8" marks the quantized value format (see _pack_embedding)
+    return f"embed:i8:{_digest(' '.join(text.lower().split()).encode())}"
+
+
+def get_cached_embedding(text: str) -> Optional[np.ndarray]:
     """Get cached embedding for text"""
     try:
-        key = f"embed:{text}"
+        key = _text_key(text)
 
-        if redis_client:
-            cached = redis_client.get(key)
+        if redis_client_bin:
+            cached = redis_client_bin.get(key)
             if cached:
-                return json.loads(cached)
+                return _unpack_embedding(cached)
         else:
             # Fallback to memory cache
             return memory_cache.get(key)
@@ -55,16 +191,16 @@ def get_cached_embedding(text: str) -> Optional[List[float]]:
     return None
 
 
-def set_cached_embedding(text: str, embedding: List[float]) -> None:
+def set_cached_embedding(text: str, embedding: Union[List[float], np.ndarray]) -> None:
     """Cache embedding with TTL"""
     try:
-        key = f"embed:{text}"
+        key = _text_key(text)
 
-        if redis_client:
-            redis_client.setex(key, EMBEDDING_TTL, json.dumps(embedding))
+        if redis_client_bin:
+            redis_client_bin.setex(key, EMBEDDING_TTL, _pack_embedding(embedding))
         else:
             # Fallback to memory cache
-            memory_cache[key] = embedding
+            memory_cache.set(key, embedding, EMBEDDING_TTL)
 
         logger.info(f"✅ Cached embedding for: {text[:50]}...")
 
@@ -72,12 +208,22 @@ def set_cached_embedding(text: str, embedding: List[float]) -> None:
         logger.error(f"❌ Error caching embedding: {e}")
 
 
-def get_cached_match(embedding: List[float]) -> Optional[List[Any]]:
+def _embedding_key(embedding: Union[List[float], np.ndarray]) -> str:
+    """
+    Cache key hashed from the embedding's raw bytes (no str() of every float).
+
+    Components (unit-length embeddings lie in [-1, 1]) are quantized to int8
+    first, so near-identical embeddings share an entry.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    data = np.round(np.clip(vector, -1.0, 1.0) * 127).astype(np.int8).tobytes()
+    return f"match:{_digest(data)}"
+
+
+def get_cached_match(embedding: Union[List[float], np.ndarray]) -> Optional[List[Any]]:
     """Get cached search matches for embedding"""
     try:
-        # Create hash of embedding for efficient key storage
-        embedding_hash = hashlib.md5(str(embedding).encode()).hexdigest()
-        key = f"match:{embedding_hash}"
+        key = _embedding_key(embedding)
 
         if redis_client:
             cached = redis_client.get(key)
@@ -93,18 +239,31 @@ def get_cached_match(embedding: List[float]) -> Optional[List[Any]]:
     return None
 
 
-def set_cached_match(embedding: List[float], matches: List[Any]) -> None:
-    """Cache search matches with TTL"""
+def match_cache_generation() -> int:
+    """Current match cache generation (pass to set_cached_match)"""
+    return _match_generation
+
+
+def set_cached_match(
+    embedding: Union[List[float], np.ndarray],
+    matches: List[Any],
+    generation: Optional[int] = None,
+) -> None:
+    """
+    Cache search matches with TTL. With ``generation`` (from
+    match_cache_generation before searching), matches found before the match
+    cache was last cleared are not cached
+    """
+    if generation is not None and generation != _match_generation:
+        return
     try:
-        # Create hash of embedding for efficient key storage
-        embedding_hash = hashlib.md5(str(embedding).encode()).hexdigest()
-        key = f"match:{embedding_hash}"
+        key = _embedding_key(embedding)
 
         if redis_client:
             redis_client.setex(key, MATCH_TTL, json.dumps(matches))
         else:
             # Fallback to memory cache
-            memory_cache[key] = matches
+            memory_cache.set(key, matches, MATCH_TTL)
 
         logger.info(f"✅ Cached {len(matches)} matches")
 
@@ -112,21 +271,56 @@ def set_cached_match(embedding: List[float], matches: List[Any]) -> None:
         logger.error(f"❌ Error caching matches: {e}")
 
 
+def _delete_prefix(pattern: str) -> int:
+    """Delete keys matching pattern in pipelined batches, returning the count"""
+    deleted = 0
+    pipe = redis_client.pipeline(transaction=False)
+    for key in redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+        pipe.delete(key)
+        deleted += 1
+        if deleted % SCAN_BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    return deleted
+
+
+def clear_match_cache() -> int:
+    """Delete every cached search result, returning the count"""
+    global _match_generation
+    _match_generation += 1
+    try:
+        if redis_client:
+            return _delete_prefix("match:*")
+        return memory_cache.delete_prefix("match:")
+    except Exception as e:
+        logger.error(f"❌ Error clearing cached matches: {e}")
+        return 0
+
+
+def invalidate_search_caches() -> None:
+    """
+    Drop cached answers and search results: call after any write to the
+    embedding store, since both may reference removed or outdated chunks
+    """
+    invalidate_semantic_caches()
+    cleared = clear_match_cache()
+    if cleared:
+        logger.debug("🧹 Dropped {} cached search results", cleared)
+
+
 def clear_cache() -> None:
     """Clear all cache entries (useful for debugging)"""
+    global _match_generation
+    _match_generation += 1
+    invalidate_semantic_caches()
     try:
         if redis_client:
-            # Clear all keys with our prefixes
-            embed_keys = redis_client.keys("embed:*")
-            match_keys = redis_client.keys("match:*")
-
-            if embed_keys:
-                redis_client.delete(*embed_keys)
-            if match_keys:
-                redis_client.delete(*match_keys)
+            # Clear all keys with our prefixes (SCAN, not KEYS, so Redis never blocks)
+            embed_keys = _delete_prefix("embed:*")
+            match_keys = _delete_prefix("match:*")
 
             logger.info(
-                f"✅ Cleared {len(embed_keys)} embedding keys and {len(match_keys)} match keys"
+                f"✅ Cleared {embed_keys} embedding keys and {match_keys} match keys"
             )
         else:
             memory_cache.clear()
@@ -140,27 +334,23 @@ def get_cache_stats() -> dict:
     """Get cache statistics"""
     try:
         if redis_client:
-            embed_keys = len(redis_client.keys("embed:*"))
-            match_keys = len(redis_client.keys("match:*"))
+            # Per-prefix counts would need a full keyspace walk; DBSIZE is O(1)
             info = redis_client.info()
 
             return {
                 "type": "redis",
-                "embedding_keys": embed_keys,
-                "match_keys": match_keys,
+                "total_keys": redis_client.dbsize(),
                 "memory_usage": info.get("used_memory_human", "N/A"),
                 "connected_clients": info.get("connected_clients", "N/A"),
             }
         else:
+            # Same fields as the Redis branch (minus its server info), so the
+            # stats shape doesn't depend on the backend
             return {
                 "type": "memory",
                 "total_keys": len(memory_cache),
-                "embedding_keys": len(
-                    [k for k in memory_cache.keys() if k.startswith("embed:")]
-                ),
-                "match_keys": len(
-                    [k for k in memory_cache.keys() if k.startswith("match:")]
-                ),
+                "memory_usage": "N/A",
+                "connected_clients": "N/A",
             }
 
     except Exception as e:
@@ -4,6 +4,7 @@ Handles environment variables and storage type determination
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
@@ -20,6 +21,9 @@ class Config:
         # Core settings
         self.debug = self._get_bool("DEBUG", False)
         self.log_level = self._get_str("LOG_LEVEL", "INFO")
+        self.model_name = self._get_str("RAG_MODEL", "llama")
+        self.api_host = self._get_str("API_HOST", "127.0.0.1")
+        self.api_port = self._get_int("API_PORT", 8000)
 
         # Storage configuration
         self.embedding_storage = self._get_str("EMBEDDING_STORAGE", "local")
@@ -28,6 +32,12 @@ class Config:
         # Database configuration (for online storage)
         self.supabase_url = self._get_str("SUPABASE_URL", "")
         self.supabase_key = self._get_str("SUPABASE_KEY", "")
+        self.embed_concurrency = self._get_int("EMBED_CONCURRENCY", 8)  # in-flight inserts
+        self.embed_batch_size = self._get_int("EMBED_BATCH_SIZE", 64)  # texts per forward pass
+        # Inference backend for the embedding model: "torch", "onnx" or "openvino"
+        self.embed_backend = self._get_str("EMBED_BACKEND", "torch")
+        # ONNX file from the model repo, e.g. onnx/model_qint8_avx512_vnni.onnx
+        self.embed_onnx_file = self._get_str("EMBED_ONNX_FILE", "")
 
         # API Keys
         self.groq_api_key = self._get_str("GROQ_API_KEY", "")
@@ -40,9 +50,9 @@ class Config:
         self.use_cache = self._get_bool("USE_CACHE", True)
 
         # async tasks
-        self.embedding_sync_interval = int(os.getenv("EMBEDDING_SYNC_INTERVAL", 30))  # seconds
-        self.drive_sync_interval = int(os.getenv("DRIVE_SYNC_INTERVAL", 300))  # seconds
-        self.file_scan_interval = int(os.getenv("FILE_SCAN_INTERVAL", 60))  # seconds
+        self.embedding_sync_interval = self._get_int("EMBEDDING_SYNC_INTERVAL", 30)  # seconds
+        self.drive_sync_interval = self._get_int("DRIVE_SYNC_INTERVAL", 300)  # seconds
+        self.file_scan_interval = self._get_int("FILE_SCAN_INTERVAL", 60)  # seconds
         
         # Validate configuration
         self._validate_config()
@@ -121,13 +131,13 @@ class Config:
         return self.embedding_storage
 
     def get_model_name(self) -> str:
-        return os.getenv("RAG_MODEL", "llama")
+        return self.model_name
 
     def get_api_host(self) -> str:
-        return os.getenv("API_HOST", "127.0.0.1")
+        return self.api_host
 
     def get_api_port(self) -> int:
-        return int(os.getenv("API_PORT", "8000"))
+        return self.api_port
 
     def get_debug_mode(self) -> bool:
         return self.debug
@@ -145,36 +155,35 @@ class Config:
         return bool(self.supabase_url and self.supabase_key)
 
 
-# Global config instance
-config = Config()
-
-
-# Helper functions for easy access
+# Global config instance, built on first use rather than at import (loading
+# .env, validation and the storage mkdir only happen when config is needed)
+@lru_cache(maxsize=1)
 def get_config() -> Config:
     """Get the global configuration instance"""
-    return config
+    return Config()
 
 
+# Helper functions for easy access
 def is_local_storage() -> bool:
     """Check if using local storage"""
-    return config.is_local_storage()
+    return get_config().is_local_storage()
 
 
 def is_database_storage() -> bool:
     """Check if using database storage"""
-    return config.is_database_storage()
+    return get_config().is_database_storage()
 
 
 def get_storage_config() -> Dict[str, Any]:
     """Get storage configuration"""
-    return config.get_storage_config()
+    return get_config().get_storage_config()
 
 
 def is_sync_storage() -> bool:
     """Check if using sync storage"""
-    return config.is_sync_storage()
+    return get_config().is_sync_storage()
 
 
 def has_database_config() -> bool:
     """Check if database config is available"""
-    return config.has_database_config()
+    return get_config().has_database_config()
@@ -1,29 +1,120 @@
 import asyncio
 import concurrent.futures
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
 import traceback
-from typing import List, Dict, Any, Optional, Union
-from functools import lru_cache
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 import numpy as np
+import torch
 from loguru import logger
 from sentence_transformers import SentenceTransformer
 
 from utils.core.config import get_config
+from utils.core.cache import invalidate_search_caches
 from utils.data.local_embedding_store import LocalEmbeddingStore
 from utils.data.sync_embedding_store import SyncEmbeddingStore
 
+try:
+    from utils.data.database_embedding_store import DatabaseEmbeddingStore
+except ImportError as e:
+    logger.warning(f"📦 Database embedding store unavailable: {e}")
+    DatabaseEmbeddingStore = None
+
 # Global model instance (lazy loaded)
 _model = None
+# Disk cache key of the loaded model, "<name>:<backend>:<dtype>": exported
+# backends and fp16 give slightly different vectors, so they don't share rows
+_model_key = None
 _embedding_store = None
+_store_lock = threading.Lock()
+
+# Recently embedded texts (normalized-text digest -> read-only vector), so a
+# repeated question skips the model
+EMBED_CACHE_SIZE = 4096
+_embed_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_embed_cache_lock = threading.Lock()
+
+# Embeddings of every text embedded by embed_texts_batch, kept on disk
+# (_model_key, normalized-text digest -> float32 bytes), so re-ingesting
+# unchanged files skips the model
+EMBED_DISK_CACHE_FILE = "embedding_cache.sqlite3"
+SQLITE_MAX_VARIABLES = 900  # bound parameters per lookup query
+_disk_cache = None  # sqlite3 connection, False if it couldn't be opened
+_disk_cache_lock = threading.Lock()
+
+# Single-embedding writes, stored off the caller's path by one writer thread
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_WAIT = 0.05  # seconds to wait for more writes before storing
+_write_queue: "queue.Queue" = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+# Shared executors for the async wrappers: one thread owns the model (calls
+# queue up instead of contending for it), searches get their own pool
+_EMBED_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="embed"
+)
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="embed-search")
+
+# embed_text_async coalescing: wait this long for more requests, up to this many
+EMBED_COALESCE_WAIT = 0.005  # seconds
+EMBED_COALESCE_SIZE = 32
+_embed_requests: Optional[asyncio.Queue] = None
+_embed_batcher: Optional[asyncio.Task] = None
+
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def _load_exported_model(backend: str) -> Optional[SentenceTransformer]:
+    """
+    Load the model through ONNX Runtime / OpenVINO (needs optimum installed);
+    None if that fails, so the caller falls back to PyTorch
+    """
+    model_kwargs = {}
+    onnx_file = get_config().embed_onnx_file
+    if backend == "onnx":
+        model_kwargs["provider"] = "CPUExecutionProvider"
+        if onnx_file:
+            model_kwargs["file_name"] = onnx_file
+    try:
+        logger.info(f"Loading SentenceTransformer model with the {backend} backend...")
+        return SentenceTransformer(EMBED_MODEL_NAME, backend=backend, model_kwargs=model_kwargs)
+    except Exception as e:
+        logger.warning(f"⚠️ {backend} backend unavailable, falling back to PyTorch: {e}")
+        return None
 
 
 def _get_model() -> Optional[SentenceTransformer]:
     """Lazy load the SentenceTransformer model"""
-    global _model
+    global _model, _model_key
     if _model is None:
         try:
-            logger.info("Loading SentenceTransformer model...")
-            _model = SentenceTransformer("all-MiniLM-L6-v2")
+            config = get_config()
+            backend = config.embed_backend
+            if backend in ("onnx", "openvino"):
+                _model = _load_exported_model(backend)
+                # A quantized ONNX file is its own precision
+                dtype = (backend == "onnx" and config.embed_onnx_file) or "float32"
+                _model_key = f"{EMBED_MODEL_NAME}:{backend}:{dtype}"
+
+            if _model is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                logger.info(f"Loading SentenceTransformer model on {device}...")
+                _model = SentenceTransformer(EMBED_MODEL_NAME, device=device)
+                dtype = "float32"
+                if device == "cuda":
+                    # fp16 weights/activations: half the memory traffic, tensor
+                    # cores for the matmuls (outputs are cast back to float32)
+                    _model = _model.half()
+                    dtype = "float16"
+                _model_key = f"{EMBED_MODEL_NAME}:torch:{dtype}"
             logger.info("✅ Model loaded successfully!")
         except Exception as e:
             logger.error(f"❌ Failed to load model: {e}")
@@ -31,13 +122,19 @@ def _get_model() -> Optional[SentenceTransformer]:
     return _model
 
 
-@lru_cache(maxsize=1)
 def get_embedding_store():
-    """Get embedding store with caching and detailed error logging"""
+    """Get the shared embedding store (created once, even under concurrent first use)"""
     global _embedding_store
     if _embedding_store is not None:
         return _embedding_store
+    with _store_lock:
+        if _embedding_store is None:
+            _embedding_store = _create_embedding_store()
+        return _embedding_store
+
 
+def _create_embedding_store():
+    """Build the embedding store for the configured storage mode, with detailed error logging"""
     try:
         config = get_config()
         logger.info(f"🔧 Config loaded - Storage mode: {config.embedding_storage}")
@@ -56,97 +153,356 @@ def get_embedding_store():
             if config.has_database_config():
                 try:
                     logger.info("🔧 Attempting to initialize database store...")
-                    from utils.data.database_embedding_store import (
-                        DatabaseEmbeddingStore,
-                    )
-
-                    if not hasattr(config, "supabase_key") or not config.supabase_key:
+                    if DatabaseEmbeddingStore is None:
+                        logger.warning("📦 Database embedding store import failed")
+                    elif not getattr(config, "supabase_key", None):
                         logger.warning("⚠️  Missing supabase_key for database store")
                     else:
                         db_store = DatabaseEmbeddingStore(
-                            {"url": config.supabase_url, "key": config.supabase_key}
+                            {
+                                "url": config.supabase_url,
+                                "key": config.supabase_key,
+                                "concurrency": config.embed_concurrency,
+                            }
                         )
                         logger.info("✅ Database embedding store initialized")
-                except ImportError as e:
-                    logger.warning(f"📦 Database embedding store import failed: {e}")
                 except Exception as e:
                     logger.warning(f"❌ Database embedding store init failed: {e}")
             else:
                 logger.info("ℹ️  No database config found, using local store only")
 
-            _embedding_store = SyncEmbeddingStore(local_store, db_store)
+            store = SyncEmbeddingStore(local_store, db_store)
             logger.info("✅ Sync embedding store initialized")
 
         elif config.is_local_storage():
             logger.info("💾 Using local storage mode")
-            _embedding_store = local_store
+            store = local_store
         else:  # database mode
             logger.info("🗄️  Using database storage mode")
             if config.has_database_config():
                 try:
-                    from utils.data.database_embedding_store import (
-                        DatabaseEmbeddingStore,
-                    )
-
-                    if not hasattr(config, "supabase_key") or not config.supabase_key:
+                    if DatabaseEmbeddingStore is None:
+                        logger.error("❌ Database embedding store import failed")
+                        logger.info("🔄 Falling back to local storage")
+                        store = local_store
+                    elif not getattr(config, "supabase_key", None):
                         logger.error("❌ Missing supabase_key for database mode")
                         logger.info("🔄 Falling back to local storage")
-                        _embedding_store = local_store
+                        store = local_store
                     else:
-                        _embedding_store = DatabaseEmbeddingStore(
-                            {"url": config.supabase_url, "key": config.supabase_key}
+                        store = DatabaseEmbeddingStore(
+                            {
+                                "url": config.supabase_url,
+                                "key": config.supabase_key,
+                                "concurrency": config.embed_concurrency,
+                            }
                         )
                         logger.info("✅ Database embedding store initialized")
                 except Exception as e:
                     logger.error(f"❌ Database mode failed: {e}")
                     logger.info("🔄 Falling back to local storage")
-                    _embedding_store = local_store
+                    store = local_store
             else:
                 logger.info("ℹ️  No database config, using local storage")
-                _embedding_store = local_store
+                store = local_store
 
-        return _embedding_store
+        return store
 
     except Exception as e:
-        logger.error(f"❌ Critical error in get_embedding_store: {e}")
+        logger.error(f"❌ Critical error creating embedding store: {e}")
         logger.error(f"📍 Error type: {type(e).__name__}")
         logger.error(f"📍 Traceback: {traceback.format_exc()}")
         raise
 
 
-def embed_text(text: str, store_key: Optional[str] = None) -> list:
+def is_document_text(text: str, store_key: Optional[str]) -> bool:
+    """
+    Whether text should be stored as a document (not a question): it has a
+    store_key, is longer than 100 characters and does not end with '?'
+    """
+    if not store_key or len(text) <= 100:
+        return False
+    # Last non-whitespace character, without stripping a copy of the text
+    last = next((c for c in reversed(text) if not c.isspace()), "")
+    return last != "?"
+
+
+def _text_digest(text: str) -> bytes:
+    # The model is uncased and splits on whitespace: normalize before hashing
+    return hashlib.blake2b(
+        " ".join(text.lower().split()).encode(), digest_size=16
+    ).digest()
+
+
+def _remember_embedding(digest: bytes, embedding: np.ndarray) -> np.ndarray:
+    embedding.setflags(write=False)  # shared between callers
+    with _embed_cache_lock:
+        _embed_cache[digest] = embedding
+        _embed_cache.move_to_end(digest)
+        while len(_embed_cache) > EMBED_CACHE_SIZE:
+            _embed_cache.popitem(last=False)
+    return embedding
+
+
+def _encode_many_cached(model: SentenceTransformer, texts: List[str]) -> List[np.ndarray]:
+    """
+    Unit-length float32 embeddings of texts: recently seen texts come from the
+    LRU, the rest go through the model in one encode call
+    """
+    digests = [_text_digest(text) for text in texts]
+    embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+    with _embed_cache_lock:
+        for i, digest in enumerate(digests):
+            embedding = _embed_cache.get(digest)
+            if embedding is not None:
+                _embed_cache.move_to_end(digest)
+                embeddings[i] = embedding
+
+    # Texts missing from the cache, each encoded once even if repeated
+    misses: Dict[bytes, List[int]] = {}
+    for i, embedding in enumerate(embeddings):
+        if embedding is None:
+            misses.setdefault(digests[i], []).append(i)
+    if misses:
+        encoded = np.asarray(
+            model.encode(
+                [texts[positions[0]] for positions in misses.values()],
+                batch_size=get_config().embed_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ),
+            dtype=np.float32,
+        )
+        for (digest, positions), embedding in zip(misses.items(), encoded):
+            embedding = _remember_embedding(digest, np.ascontiguousarray(embedding))
+            for i in positions:
+                embeddings[i] = embedding
+    return embeddings
+
+
+def _encode_cached(model: SentenceTransformer, text: str) -> np.ndarray:
+    """Unit-length float32 embedding of text, from the LRU when seen recently"""
+    return _encode_many_cached(model, [text])[0]
+
+
+def _get_disk_cache() -> Optional[sqlite3.Connection]:
+    """Connection to the on-disk embedding cache (opened on first use)"""
+    global _disk_cache
+    if _disk_cache is None:
+        try:
+            path = Path(get_config().embedding_db_path)
+            path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(path / EMBED_DISK_CACHE_FILE), check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "model TEXT NOT NULL, content_hash BLOB NOT NULL, "
+                "embedding BLOB NOT NULL, PRIMARY KEY (model, content_hash)"
+                ") WITHOUT ROWID"
+            )
+            conn.commit()
+            _disk_cache = conn
+            logger.info(f"✅ Embedding disk cache opened at: {path / EMBED_DISK_CACHE_FILE}")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding disk cache unavailable: {e}")
+            _disk_cache = False
+    return _disk_cache or None
+
+
+def _load_disk_embeddings(texts: List[str]) -> Dict[int, np.ndarray]:
+    """Embeddings of texts found in the disk cache, by position in texts"""
+    found: Dict[int, np.ndarray] = {}
+    with _disk_cache_lock:
+        conn = _get_disk_cache()
+        if conn is None or _model_key is None or not texts:
+            return found
+        positions: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(_text_digest(text), []).append(i)
+        digests = list(positions)
+        try:
+            for start in range(0, len(digests), SQLITE_MAX_VARIABLES):
+                part = digests[start : start + SQLITE_MAX_VARIABLES]
+                rows = conn.execute(
+                    "SELECT content_hash, embedding FROM embedding_cache "
+                    f"WHERE model = ? AND content_hash IN ({','.join('?' * len(part))})",
+                    [_model_key, *part],
+                )
+                for digest, blob in rows:
+                    embedding = np.frombuffer(blob, dtype=np.float32)
+                    for i in positions[bytes(digest)]:
+                        found[i] = embedding
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding disk cache lookup failed: {e}")
+    return found
+
+
+def _save_disk_embeddings(texts: List[str], embeddings: np.ndarray):
+    """Add embeddings of texts to the disk cache"""
+    with _disk_cache_lock:
+        conn = _get_disk_cache()
+        if conn is None or _model_key is None or not texts:
+            return
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (model, content_hash, embedding) "
+                "VALUES (?, ?, ?)",
+                (
+                    (_model_key, _text_digest(text), embedding.tobytes())
+                    for text, embedding in zip(
+                        texts, np.asarray(embeddings, dtype=np.float32)
+                    )
+                ),
+            )
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding disk cache write failed: {e}")
+
+
+def save_embedding_cache(path: Union[str, Path]) -> bool:
+    """Write the embedding LRU to an .npz file (oldest first)"""
+    with _embed_cache_lock:
+        items = list(_embed_cache.items())
+    if not items:
+        return True
+    try:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digests, embeddings = zip(*items)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                digests=np.array(digests, dtype="S16"),
+                embeddings=np.stack(embeddings),
+            )
+        logger.info(f"💾 Saved {len(items)} cached embeddings")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error saving embedding cache: {e}")
+        return False
+
+
+def load_embedding_cache(path: Union[str, Path]) -> bool:
+    """Restore an embedding LRU written by save_embedding_cache"""
+    path = Path(path)
+    if not path.exists():
+        return False
+    try:
+        with np.load(path) as data:
+            digests, embeddings = data["digests"], data["embeddings"]
+        for digest, embedding in zip(digests[-EMBED_CACHE_SIZE:], embeddings[-EMBED_CACHE_SIZE:]):
+            _remember_embedding(bytes(digest), np.array(embedding, dtype=np.float32))
+        logger.info(f"✅ Loaded {len(_embed_cache)} cached embeddings")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error loading embedding cache: {e}")
+        return False
+
+
+def embed_text(
+    text: str, store_key: Optional[str] = None, store: Optional[bool] = None
+) -> np.ndarray:
     """
     Create embedding for text and optionally store it
 
     Args:
         text: Text to embed
         store_key: Optional key for storage (e.g., file path or chunk ID)
+        store: Whether to store the embedding under store_key; by default it
+            is stored only if is_document_text(text, store_key)
 
     Returns:
-        List representation of embedding vector
+        C-contiguous, read-only float32 embedding vector (empty on failure)
     """
     model = _get_model()
     if model is None:
         logger.error("❌ Model not loaded, cannot create embedding")
-        return []
+        return np.empty(0, dtype=np.float32)
+
+    # Only store if this is a document (not a question); decided up front so
+    # query embeddings skip the storage plumbing entirely
+    if store is None:
+        store = is_document_text(text, store_key)
+    store = bool(store_key) and store
 
     try:
-        logger.debug(f"🔄 Creating embedding for: '{text[:50]}...'")
-        embedding = model.encode(text)
-        logger.debug(f"✅ Embedding created with shape: {embedding.shape}")
+        # Lazy formatting: nothing is built unless debug logging is on
+        logger.debug("🔄 Creating embedding for: '{}...'", text[:50])
+        embedding = _encode_cached(model, text)
+        logger.debug("✅ Embedding created with shape: {}", embedding.shape)
 
-        # Only store if this is a document (not a question)
-        is_document = (
-            bool(store_key) and len(text) > 100 and not text.strip().endswith("?")
+        if store:
+            _store_text_embedding(embedding, text, store_key)
+
+        return embedding
+    except Exception as e:
+        logger.error(f"❌ Local embedding error: {e}")
+        logger.debug(f"Traceback: {traceback.format_exc()}")
+        return np.empty(0, dtype=np.float32)
+
+
+def embed_text_tensor(text: str) -> Optional[torch.Tensor]:
+    """
+    Unit-length embedding of text left on the model's device, for searches
+    that score on that device (no device-to-host copy of the query)
+    """
+    model = _get_model()
+    if model is None:
+        logger.error("❌ Model not loaded, cannot create embedding")
+        return None
+
+    try:
+        return model.encode(
+            text,
+            convert_to_tensor=True,
+            device=model.device,
+            normalize_embeddings=True,
+            show_progress_bar=False,
         )
-        if store_key and is_document:
-            store_single_embedding(np.array(embedding), text, store_key)
+    except Exception as e:
+        logger.error(f"❌ Local embedding error: {e}")
+        logger.debug(f"Traceback: {traceback.format_exc()}")
+        return None
+
+
+def _searches_on_device(store) -> bool:
+    """Whether queries for store can stay on the model's GPU"""
+    model = _get_model()
+    return (
+        model is not None
+        and getattr(model.device, "type", "cpu") == "cuda"
+        and isinstance(getattr(store, "local_store", store), LocalEmbeddingStore)
+    )
+
+
+def embed_text_requests(
+    requests: List[Tuple[str, Optional[str], Optional[bool]]],
+) -> List[np.ndarray]:
+    """
+    embed_text for several (text, store_key, store) requests with one model
+    call; each result is what embed_text would have returned
+    """
+    model = _get_model()
+    if model is None:
+        logger.error("❌ Model not loaded, cannot create embedding")
+        return [np.empty(0, dtype=np.float32) for _ in requests]
 
-        return embedding.tolist()
+    try:
+        embeddings = _encode_many_cached(model, [text for text, _, _ in requests])
+        for (text, store_key, store), embedding in zip(requests, embeddings):
+            # Only store if this is a document (not a question)
+            if store is None:
+                store = is_document_text(text, store_key)
+            if store_key and store:
+                _store_text_embedding(embedding, text, store_key)
+        return embeddings
     except Exception as e:
         logger.error(f"❌ Local embedding error: {e}")
         logger.debug(f"Traceback: {traceback.format_exc()}")
-        return []
+        return [np.empty(0, dtype=np.float32) for _ in requests]
 
 
 def embed_texts_batch(
@@ -154,87 +510,153 @@ def embed_texts_batch(
     chunks: Optional[List[Dict[str, Any]]] = None,
     metadata: Optional[Dict[str, Any]] = None,
     store_results: bool = False,
-) -> List[list]:
+    batch_size: Optional[int] = None,
+    normalize_embeddings: bool = True,
+) -> np.ndarray:
     """
     Create embeddings for multiple texts and optionally store them
 
+    Texts go through the model batch_size at a time (encode sorts them by
+    length first and restores the input order, so each batch pads to similar
+    lengths). Repeated texts (cross-referenced sections are common in legal
+    data) are encoded once, and normalized embeddings of texts embedded on
+    earlier runs are read from the disk cache instead of the model.
+
     Args:
         texts: List of texts to embed
         chunks: Optional list of chunk metadata (must match texts length)
         metadata: Optional metadata for storage (e.g., file info)
         store_results: Whether to store embeddings after generation
+        batch_size: Texts per forward pass (default: config.embed_batch_size)
+        normalize_embeddings: Return unit-length rows (search assumes this)
 
     Returns:
-        List of embedding vectors
+        (len(texts), dim) float32 matrix of embeddings (empty on failure)
     """
     model = _get_model()
     if model is None:
         logger.error("❌ Model not loaded, cannot create embeddings")
-        return []
+        return np.empty((0, 0), dtype=np.float32)
 
     try:
         logger.info(f"🔄 Creating embeddings for {len(texts)} texts...")
-        embeddings = model.encode(texts)
+        # The model is uncased and splits on whitespace, so texts differing only
+        # in case/spacing embed identically
+        slots: Dict[str, int] = {}
+        inverse = np.fromiter(
+            (slots.setdefault(" ".join(t.lower().split()), len(slots)) for t in texts),
+            dtype=np.intp,
+            count=len(texts),
+        )
+        unique_texts = [""] * len(slots)
+        for text, slot in zip(texts, inverse):
+            unique_texts[slot] = text
+
+        # Unchanged texts from earlier runs come from the disk cache
+        cached = _load_disk_embeddings(unique_texts) if normalize_embeddings else {}
+        missing = [i for i in range(len(unique_texts)) if i not in cached]
+        if missing or not cached:
+            encoded = model.encode(
+                [unique_texts[i] for i in missing],
+                batch_size=batch_size or get_config().embed_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=normalize_embeddings,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+            if normalize_embeddings:
+                _save_disk_embeddings([unique_texts[i] for i in missing], encoded)
+        if cached:
+            logger.info(f"💾 Reused {len(cached)} embeddings from the disk cache")
+            embeddings = np.empty(
+                (len(unique_texts), len(next(iter(cached.values())))), dtype=np.float32
+            )
+            for i, embedding in cached.items():
+                embeddings[i] = embedding
+            if missing:
+                embeddings[missing] = encoded
+        else:
+            embeddings = encoded
+        if len(unique_texts) < len(texts):
+            logger.info(f"♻️ Reused embeddings for {len(texts) - len(unique_texts)} duplicate texts")
+            embeddings = embeddings[inverse]
         logger.info(f"✅ {len(embeddings)} embeddings created")
 
         if store_results and metadata:
             store_embeddings_batch(embeddings, texts, chunks, metadata)
 
-        return [emb.tolist() for emb in embeddings]
+        return embeddings
     except Exception as e:
         logger.error(f"❌ Batch embedding error: {e}")
         logger.debug(f"Traceback: {traceback.format_exc()}")
-        return []
-
-
-def store_single_embedding(
-    embedding: np.ndarray,
-    text: str,
-    store_key: str,
-    metadata: Optional[Dict[str, Any]] = None,
-) -> bool:
-    """
-    Store a single embedding
-
-    Args:
-        embedding: Embedding vector
-        text: Original text
-        store_key: Storage key (e.g., file path or chunk ID)
-        metadata: Optional metadata
-
-    Returns:
-        True if stored successfully
-    """
-    try:
-        store = get_embedding_store()
-        if store is None:
-            logger.error("❌ No embedding store available")
-            return False
-
-        chunk = {
-            "content": text,
-            "id": store_key,
-            "metadata": {"store_key": store_key, "text_length": len(text)},
-        }
-
-        if metadata is None:
-            metadata = {
-                "file_path": store_key,
-                "chunk_count": 1,
-                "source": "single_embed",
+        return np.empty((0, 0), dtype=np.float32)
+
+
+def _store_text_embedding(embedding: np.ndarray, text: str, store_key: str) -> bool:
+    """Queue one text's embedding for storage under store_key"""
+    return store_embeddings_batch(
+        embedding[np.newaxis, :],
+        [text],
+        chunks=[
+            {
+                "content": text,
+                "id": store_key,
+                "metadata": {"store_key": store_key, "text_length": len(text)},
             }
+        ],
+        metadata={"file_path": store_key, "chunk_count": 1, "source": "single_embed"},
+        background=True,
+    )
+
+
+def _get_write_queue() -> "queue.Queue":
+    """Queue of pending background writes (starts the writer on first use)"""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(
+                target=_write_embeddings, name="embedding-writer", daemon=True
+            )
+            _writer_thread.start()
+    return _write_queue
+
+
+def _write_embeddings():
+    """Writer loop: store queued embeddings in batches of up to WRITE_BATCH_SIZE"""
+    while True:
+        batch = [_write_queue.get()]
+        # Collect whatever else arrives within WRITE_BATCH_WAIT
+        deadline = time.monotonic() + WRITE_BATCH_WAIT
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(
+                    _write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                )
+            except queue.Empty:
+                break
 
-        success = store.store_embeddings([embedding], [chunk], metadata)
-        if success:
-            logger.debug(f"✅ Embedding stored for key: {store_key}")
-        else:
-            logger.error(f"❌ Failed to store embedding for key: {store_key}")
+        try:
+            store = get_embedding_store()
+            if store is None:
+                logger.error("❌ No embedding store available")
+            else:
+                # Only the latest write per key is kept
+                latest = {item[2].get("file_path"): item for item in batch}
+                if store.store_embedding_sets(list(latest.values())):
+                    invalidate_search_caches()
+                    logger.debug(f"✅ Stored {len(latest)} queued embeddings")
+                else:
+                    logger.error(f"❌ Failed to store {len(latest)} queued embeddings")
+        except Exception as e:
+            logger.error(f"❌ Error storing queued embeddings: {e}")
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
 
-        return success
 
-    except Exception as e:
-        logger.error(f"❌ Error storing single embedding: {e}")
-        return False
+def flush_embeddings():
+    """Block until every queued background write has been stored"""
+    if _writer_thread is not None:
+        _write_queue.join()
 
 
 def store_embeddings_batch(
@@ -242,33 +664,27 @@ def store_embeddings_batch(
     texts: List[str],
     chunks: Optional[List[Dict[str, Any]]] = None,
     metadata: Optional[Dict[str, Any]] = None,
+    background: bool = False,
 ) -> bool:
     """
     Store multiple embeddings
 
     Args:
-        embeddings: List of embedding vectors or numpy array
+        embeddings: (n, dim) matrix (passed to the store as is) or list of vectors
         texts: List of original texts
         chunks: Optional list of chunk metadata
         metadata: Optional metadata for storage
+        background: Queue the write for the background writer (batched with
+            other queued writes) instead of waiting for the store; use
+            flush_embeddings to wait for queued writes
 
     Returns:
-        True if stored successfully
+        True if stored successfully (or queued)
     """
     try:
-        store = get_embedding_store()
-        if store is None:
-            logger.error("❌ No embedding store available")
-            return False
-
-        # Normalize embeddings to list of numpy arrays
-        if isinstance(embeddings, np.ndarray):
-            embeddings = [embeddings[i] for i in range(len(embeddings))]
-        else:
-            embeddings = [
-                np.array(emb) if not isinstance(emb, np.ndarray) else emb
-                for emb in embeddings
-            ]
+        # Stores take the (n, dim) matrix directly; only lists need stacking
+        if not isinstance(embeddings, np.ndarray):
+            embeddings = np.asarray(embeddings, dtype=np.float32)
 
         # Create chunks if not provided
         if chunks is None:
@@ -296,12 +712,22 @@ def store_embeddings_batch(
                 "source": "batch_embed",
             }
 
+        if background:
+            _get_write_queue().put((embeddings, chunks, metadata))
+            return True
+
+        store = get_embedding_store()
+        if store is None:
+            logger.error("❌ No embedding store available")
+            return False
+
         logger.debug(
             f"🔍 Storing {len(embeddings)} embeddings with metadata: {metadata}"
         )
 
         success = store.store_embeddings(embeddings, chunks, metadata)
         if success:
+            invalidate_search_caches()
             logger.info(f"✅ {len(embeddings)} embeddings stored successfully")
         else:
             logger.error(f"❌ Failed to store {len(embeddings)} embeddings")
@@ -332,7 +758,7 @@ def check_embeddings_exist(file_path: str) -> bool:
 
 
 def search_stored_embeddings(
-    query: Union[str, List[float]], top_k: int = 5, threshold: float = 0.7
+    query: Union[str, List[float], np.ndarray], top_k: int = 5, threshold: float = 0.7
 ) -> List[Dict[str, Any]]:
     """
     Search for similar embeddings in storage
@@ -346,8 +772,23 @@ def search_stored_embeddings(
         List of similar embeddings with metadata
     """
     try:
+        store = get_embedding_store()
+        if store is None:
+            return []
+
+        if isinstance(query, str) and _searches_on_device(store):
+            # Embed and score on the GPU; only the top matches come back
+            query_embedding = embed_text_tensor(query)
+            if query_embedding is None:
+                return []
+            results = store.search_embeddings(query_embedding, top_k, threshold)
+            logger.info(f"✅ Found {len(results)} similar embeddings")
+            return results
+
         if isinstance(query, str):
             query_embedding = embed_text(query)
+        elif isinstance(query, np.ndarray):
+            query_embedding = query
         elif isinstance(query, list) and all(
             isinstance(x, (float, int)) for x in query
         ):
@@ -356,14 +797,12 @@ def search_stored_embeddings(
             logger.error("❌ Invalid query input type")
             return []
 
-        if not query_embedding:
-            return []
-
-        store = get_embedding_store()
-        if store is None:
+        if not len(query_embedding):
             return []
 
-        results = store.search_embeddings(np.array(query_embedding), top_k, threshold)
+        results = store.search_embeddings(
+            np.asarray(query_embedding, dtype=np.float32), top_k, threshold
+        )
         logger.info(f"✅ Found {len(results)} similar embeddings")
         return results
     except Exception as e:
@@ -407,6 +846,7 @@ def clear_stored_embeddings(file_path: Optional[str] = None) -> bool:
 
         success = store.clear_embeddings(file_path)
         if success:
+            invalidate_search_caches()
             if file_path:
                 logger.info(f"✅ Cleared embeddings for file: {file_path}")
             else:
@@ -421,11 +861,56 @@ def clear_stored_embeddings(file_path: Optional[str] = None) -> bool:
 
 
 # Async wrappers
-async def embed_text_async(text: str, store_key: Optional[str] = None) -> list:
-    """Async wrapper for embed_text"""
+async def embed_text_async(
+    text: str, store_key: Optional[str] = None, store: Optional[bool] = None
+) -> np.ndarray:
+    """
+    Async embed_text. Concurrent calls are coalesced: requests arriving within
+    EMBED_COALESCE_WAIT of each other share one model call
+    """
+    future = asyncio.get_running_loop().create_future()
+    _get_embed_requests().put_nowait((text, store_key, store, future))
+    return await future
+
+
+def _get_embed_requests() -> asyncio.Queue:
+    """Pending embed_text_async requests (starts the batcher for this loop)"""
+    global _embed_requests, _embed_batcher
     loop = asyncio.get_running_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        return await loop.run_in_executor(pool, embed_text, text, store_key)
+    if _embed_batcher is None or _embed_batcher.get_loop() is not loop or _embed_batcher.done():
+        _embed_requests = asyncio.Queue()
+        _embed_batcher = loop.create_task(_batch_embed_requests(_embed_requests))
+    return _embed_requests
+
+
+async def _batch_embed_requests(requests: asyncio.Queue):
+    """Batcher: embed queued requests together on the model thread"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await requests.get()]
+        deadline = loop.time() + EMBED_COALESCE_WAIT
+        while len(batch) < EMBED_COALESCE_SIZE:
+            try:
+                batch.append(
+                    await asyncio.wait_for(requests.get(), deadline - loop.time())
+                )
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            embeddings = await loop.run_in_executor(
+                _EMBED_EXECUTOR,
+                embed_text_requests,
+                [(text, store_key, store) for text, store_key, store, _ in batch],
+            )
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (*_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
 
 
 async def embed_texts_batch_async(
@@ -433,21 +918,19 @@ async def embed_texts_batch_async(
     chunks: Optional[List[Dict[str, Any]]] = None,
     metadata: Optional[Dict[str, Any]] = None,
     store_results: bool = False,
-) -> List[list]:
+) -> np.ndarray:
     """Async wrapper for embed_texts_batch"""
     loop = asyncio.get_running_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        return await loop.run_in_executor(
-            pool, embed_texts_batch, texts, chunks, metadata, store_results
-        )
+    return await loop.run_in_executor(
+        _EMBED_EXECUTOR, embed_texts_batch, texts, chunks, metadata, store_results
+    )
 
 
 async def search_stored_embeddings_async(
-    query_text: str, top_k: int = 5, threshold: float = 0.7
+    query: Union[str, List[float], np.ndarray], top_k: int = 5, threshold: float = 0.7
 ) -> List[Dict[str, Any]]:
     """Async wrapper for search_stored_embeddings"""
     loop = asyncio.get_running_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        return await loop.run_in_executor(
-            pool, search_stored_embeddings, query_text, top_k, threshold
-        )
+    return await loop.run_in_executor(
+        _EXECUTOR, search_stored_embeddings, query, top_k, threshold
+    )
@@ -0,0 +1,167 @@
+"""
+Semantic answer cache: reuse the answer of a recent question whose embedding
+is nearly identical (paraphrases, typos) instead of hashing the exact text
+"""
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import orjson
+from loguru import logger
+
+# Cosine similarity above which two questions share an answer
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# Number of recent questions kept
+SEMANTIC_CACHE_SIZE = 1024
+# Seconds an answer is served from the cache (also across restarts)
+SEMANTIC_CACHE_TTL = 60 * 60
+
+# Bumped whenever stored documents change; caches drop answers given earlier
+_store_generation = 0
+
+
+def invalidate_semantic_caches():
+    """Drop every cached answer (call after any write to the embedding store)"""
+    global _store_generation
+    _store_generation += 1
+
+
+class SemanticCache:
+    """Fixed-size LRU of (normalized question embedding, answer) pairs"""
+
+    def __init__(
+        self,
+        capacity: int = SEMANTIC_CACHE_SIZE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+    ):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        # Rows are allocated on the first add, once the dimension is known
+        self.embeddings: Optional[np.ndarray] = None
+        self.answers: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        # Wall-clock time each answer was cached (kept by save/load)
+        self.created = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._clock = 0
+        self._generation = _store_generation
+
+    def clear(self):
+        """Drop every entry"""
+        self.answers = [None] * self.capacity
+        self.last_used[:] = 0
+        self._size = 0
+        self._generation = _store_generation
+
+    def _check_generation(self):
+        if self._generation != _store_generation:
+            self.clear()
+
+    @staticmethod
+    def _normalize(embedding: Union[List[float], np.ndarray]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _touch(self, slot: int):
+        self._clock += 1
+        self.last_used[slot] = self._clock
+
+    def lookup(self, embedding: Union[List[float], np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Answer cached for the most similar recent question, if close enough"""
+        self._check_generation()
+        if self._size == 0:
+            return None
+        query = self._normalize(embedding)
+        if query.shape[0] != self.embeddings.shape[1]:
+            return None
+
+        sims = self.embeddings[: self._size] @ query
+        sims[self.created[: self._size] < time.time() - self.ttl] = -np.inf
+        slot = int(np.argmax(sims))
+        if sims[slot] < self.threshold:
+            return None
+
+        self._touch(slot)
+        return self.answers[slot]
+
+    def add(
+        self,
+        embedding: Union[List[float], np.ndarray],
+        answer: Dict[str, Any],
+        created: Optional[float] = None,
+    ):
+        """Cache an answer, evicting the least recently used entry when full"""
+        self._check_generation()
+        vector = self._normalize(embedding)
+        if self.embeddings is None or self.embeddings.shape[1] != vector.shape[0]:
+            self.embeddings = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self.answers = [None] * self.capacity
+            self._size = 0
+
+        if self._size < self.capacity:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+
+        self.embeddings[slot] = vector
+        self.answers[slot] = answer
+        self.created[slot] = time.time() if created is None else created
+        self._touch(slot)
+
+    def save(self, path: Union[str, Path]) -> bool:
+        """
+        Write the cache to ``path``.npy (embeddings) and ``path``.json
+        (answers and the time each was cached)
+        """
+        path = Path(path)
+        try:
+            self._check_generation()
+            if self._size == 0:
+                # Don't let a later load restore answers dropped since
+                path.with_suffix(".npy").unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+                return True
+            path.parent.mkdir(parents=True, exist_ok=True)
+            order = np.argsort(self.last_used[: self._size])
+            np.save(path.with_suffix(".npy"), self.embeddings[order])
+            path.with_suffix(".json").write_bytes(
+                orjson.dumps(
+                    [
+                        {"answer": self.answers[i], "created": float(self.created[i])}
+                        for i in order
+                    ]
+                )
+            )
+            logger.info(f"💾 Saved {self._size} semantic cache entries")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving semantic cache: {e}")
+            return False
+
+    def load(self, path: Union[str, Path]) -> bool:
+        """
+        Restore a cache written by save (expired entries are skipped, and the
+        oldest are dropped if over capacity)
+        """
+        path = Path(path)
+        npy_path, json_path = path.with_suffix(".npy"), path.with_suffix(".json")
+        if not npy_path.exists() or not json_path.exists():
+            return False
+        try:
+            embeddings = np.load(npy_path)
+            entries = orjson.loads(json_path.read_bytes())
+            cutoff = time.time() - self.ttl
+            for embedding, entry in list(zip(embeddings, entries))[-self.capacity :]:
+                # Entries saved without a timestamp predate the TTL: drop them
+                if isinstance(entry, dict) and entry.get("created", 0) >= cutoff:
+                    self.add(embedding, entry["answer"], entry["created"])
+            logger.info(f"✅ Loaded {self._size} semantic cache entries")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error loading semantic cache: {e}")
+            return False
@@ -1,66 +1,129 @@
-import json
+import os
+import numpy as np
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Union
+
+# Threads reading chunk files ahead of the parser in load_all_chunks
+READ_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
 
 class ChunkedDataLoader:
     def __init__(self, chunked_dir="data/chunked_legal_data"):
         self.chunked_dir = Path(chunked_dir)
         self._chunks = None
+        # Embedding matrix for search_chunks, built from _emb_source
+        self._emb_source = None
+        self._emb_matrix = None
+        self._emb_index = None
+        # chunk id -> position, for get_chunk_by_id (built from _id_source)
+        self._id_source = None
+        self._id_index = None
+
+    def _json_files(self) -> Iterator[str]:
+        """Paths of the chunk files (scandir reuses the directory entry's type)"""
+        try:
+            with os.scandir(self.chunked_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        yield entry.path
+        except FileNotFoundError:
+            return
 
     def load_all_chunks(self) -> List[Dict]:
         """Load all chunks from JSON files"""
         if self._chunks is None:
-            self._chunks = []
-
-            for json_file in self.chunked_dir.glob("*.json"):
-                with open(json_file, "r", encoding="utf-8") as f:
-                    chunks = json.load(f)
-                    self._chunks.extend(chunks)
+            # Reads release the GIL, so files are read in parallel while the
+            # main thread parses the ones already read
+            chunks = []
+            with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+                for data in pool.map(_read_bytes, list(self._json_files())):
+                    chunks.extend(orjson.loads(data))
+            self._chunks = chunks
 
         return self._chunks
 
-    def search_chunks(
-        self, query_embedding: List[float], threshold: float = 0.78, limit: int = 5
-    ) -> List[Dict]:
-        """Search chunks using embedding similarity"""
-        chunks = self.load_all_chunks()
+    def iter_chunks(self) -> Iterator[Dict]:
+        """
+        Yield chunks one file at a time without building the combined list
+        (only one file's chunks are held in memory when not already loaded)
+        """
+        if self._chunks is not None:
+            yield from self._chunks
+            return
 
-        # Calculate similarity for each chunk
-        chunk_similarities = []
-        for chunk in chunks:
-            if "embedding" in chunk:
-                # Calculate cosine similarity
-                similarity = self._cosine_similarity(
-                    query_embedding, chunk["embedding"]
-                )
-                if similarity >= threshold:
-                    chunk_similarities.append(
-                        {"chunk": chunk, "similarity": similarity}
-                    )
+        for json_path in self._json_files():
+            yield from orjson.loads(_read_bytes(json_path))
 
-        # Sort by similarity (highest first) and return top results
-        chunk_similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return [item["chunk"] for item in chunk_similarities[:limit]]
+    def has_chunks(self) -> bool:
+        """Check whether any chunks are available without parsing JSON files"""
+        if self._chunks is not None:
+            return len(self._chunks) > 0
+        return next(self._json_files(), None) is not None
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
-        import math
+    def count_chunks(self) -> Optional[int]:
+        """Number of loaded chunks, or None if they haven't been loaded yet"""
+        return len(self._chunks) if self._chunks is not None else None
 
-        # Calculate dot product
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
+    def _get_embedding_matrix(self, chunks: List[Dict]):
+        """
+        Unit-length (N, D) float32 matrix of the chunks that carry an embedding,
+        plus their positions in chunks (rebuilt whenever chunks are reloaded)
+        """
+        if self._emb_source is not chunks:
+            index = np.fromiter(
+                (i for i, chunk in enumerate(chunks) if "embedding" in chunk),
+                dtype=np.intp,
+            )
+            matrix = np.asarray(
+                [chunks[i]["embedding"] for i in index], dtype=np.float32
+            ).reshape(len(index), -1 if len(index) else 0)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            self._emb_matrix, self._emb_index = matrix, index
+            self._emb_source = chunks
+        return self._emb_matrix, self._emb_index
+
+    def search_chunks(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        threshold: float = 0.78,
+        limit: int = 5,
+    ) -> List[Dict]:
+        """Search chunks using embedding similarity"""
+        chunks = self.load_all_chunks()
+        matrix, index = self._get_embedding_matrix(chunks)
+        if not len(index) or limit <= 0:
+            return []
 
-        # Calculate magnitudes
-        magnitude1 = math.sqrt(sum(a * a for a in vec1))
-        magnitude2 = math.sqrt(sum(a * a for a in vec2))
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) + 1e-12)
 
-        # Avoid division by zero
-        if magnitude1 == 0 or magnitude2 == 0:
-            return 0
+        # Cosine similarity of every chunk in one matrix-vector product
+        similarities = matrix @ query
 
-        return dot_product / (magnitude1 * magnitude2)
+        # Top results (highest first) without sorting every chunk
+        if limit < len(similarities):
+            top = np.argpartition(-similarities, limit - 1)[:limit]
+        else:
+            top = np.arange(len(similarities))
+        top = top[np.argsort(-similarities[top])]
+        top = top[similarities[top] >= threshold]
+        return [chunks[i] for i in index[top]]
 
     def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict]:
         """Get specific chunk by ID"""
         chunks = self.load_all_chunks()
-        return next((chunk for chunk in chunks if chunk["id"] == chunk_id), None)
+        if self._id_source is not chunks:
+            # First occurrence wins, as with a linear scan
+            self._id_index = {}
+            for i, chunk in enumerate(chunks):
+                self._id_index.setdefault(chunk["id"], i)
+            self._id_source = chunks
+        i = self._id_index.get(chunk_id)
+        return chunks[i] if i is not None else None
@@ -2,12 +2,52 @@
 Database-based embedding storage for production/MVP version
 """
 import json
+import time
+import httpx
 import numpy as np
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
-from supabase import create_client, Client
+from supabase import Client
+from loguru import logger
+
+from .embedding_store import EmbeddingStore, is_document_match
+from .supabase_client import get_shared_client
+
+# Rows sent per multi-row INSERT
+INSERT_BATCH_SIZE = 500
+# Attempts per INSERT before a failing batch is split, and the first retry delay
+INSERT_ATTEMPTS = 3
+INSERT_BACKOFF_SECONDS = 0.5
+# Halvings of a failing batch before its rows are given up (500 -> ~31 rows)
+INSERT_MAX_SPLIT_DEPTH = 4
+
+# Server-side similarity search (pgvector). Create once in the Supabase SQL editor:
+#
+#   create or replace function match_embeddings(
+#     query_embedding vector(384), match_threshold float, match_count int
+#   ) returns table (
+#     id bigint, content text, metadata jsonb, file_path text, similarity float
+#   ) language sql stable as $$
+#     select c.id, c.content, c.metadata, f.file_path,
+#            1 - (e.embedding <=> query_embedding) as similarity
+#     from embeddings e
+#     join chunks c on c.id = e.chunk_id
+#     join files f on f.id = e.file_id
+#     where 1 - (e.embedding <=> query_embedding) >= match_threshold
+#     order by e.embedding <=> query_embedding
+#     limit match_count;
+#   $$;
+#
+# (plus an HNSW/IVFFlat index on embeddings.embedding using vector_cosine_ops).
+# Without it, search falls back to scanning the table client-side.
+MATCH_EMBEDDINGS_RPC = "match_embeddings"
+
+
+def _is_connection_error(error: Optional[Exception]) -> bool:
+    """Whether an insert failed to reach the server at all (splitting won't help)"""
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
 
-from .embedding_store import EmbeddingStore
 
 class DatabaseEmbeddingStore(EmbeddingStore):
     """Database-based embedding storage using Supabase"""
@@ -18,8 +58,15 @@ class DatabaseEmbeddingStore(EmbeddingStore):
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL and key are required for database storage")
 
-        # Initialize Supabase client
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Shared Supabase client (one connection pool per process)
+        self.client: Client = get_shared_client(self.supabase_url, self.supabase_key)
+
+        # Inserts are network-bound: keep this many requests in flight
+        self.concurrency = max(1, int(config.get("concurrency", 8)))
+        self._insert_pool = None
+
+        # Cleared once the match_embeddings RPC turns out not to be deployed
+        self._use_match_rpc = True
 
         # Table names
         self.embeddings_table = "embeddings"
@@ -36,7 +83,7 @@ class DatabaseEmbeddingStore(EmbeddingStore):
         pass
 
     def store_embeddings(self, 
-                        embeddings: List[np.ndarray], 
+                        embeddings: Union[np.ndarray, List[np.ndarray]], 
                         chunks: List[Dict[str, Any]], 
                         metadata: Dict[str, Any]) -> bool:
         """Store embeddings with associated chunks and metadata"""
@@ -47,12 +94,15 @@ class DatabaseEmbeddingStore(EmbeddingStore):
             if self.embedding_exists(file_path):
                 self.clear_embeddings(file_path)
 
+            # One timestamp for the file and all of its rows
+            created_at = datetime.now().isoformat()
+
             # Insert file metadata
             file_data = {
                 "file_path": file_path,
                 "chunk_count": len(chunks),
                 "metadata": metadata,
-                "created_at": datetime.now().isoformat()
+                "created_at": created_at
             }
 
             file_result = self.client.table(self.files_table).insert(file_data).execute()
@@ -61,47 +111,157 @@ class DatabaseEmbeddingStore(EmbeddingStore):
 
             file_id = file_result.data[0]["id"]
 
-            # Insert chunks and embeddings
-            for i, (embedding, chunk) in enumerate(zip(embeddings, chunks)):
-                # Insert chunk
-                chunk_data = {
-                    "file_id": file_id,
-                    "content": chunk.get("content", ""),
-                    "metadata": chunk,
-                    "created_at": datetime.now().isoformat()
-                }
+            # Stored L2-normalized, so search is a plain dot product
+            matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(chunks), -1 if chunks else 0)
+            matrix = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
 
-                chunk_result = self.client.table(self.chunks_table).insert(chunk_data).execute()
-                if not chunk_result.data:
-                    continue
+            # JSON-ready vectors in one conversion of the whole matrix (the only
+            # place embeddings leave numpy)
+            vectors = matrix.tolist()
 
-                chunk_id = chunk_result.data[0]["id"]
+            # Insert chunks and embeddings in multi-row batches, several at a time
+            pairs = list(zip(vectors, chunks))
+            batches = [
+                pairs[i:i + INSERT_BATCH_SIZE]
+                for i in range(0, len(pairs), INSERT_BATCH_SIZE)
+            ]
+            return all(list(self._get_insert_pool().map(
+                lambda batch: self._insert_batch(file_id, batch, created_at), batches
+            )))
 
-                # Insert embedding
-                embedding_data = {
-                    "chunk_id": chunk_id,
-                    "file_id": file_id,
-                    "embedding": embedding.tolist(),  # Convert numpy array to list
-                    "created_at": datetime.now().isoformat()
-                }
+        except Exception as e:
+            logger.error(f"❌ Error storing embeddings to database: {e}")
+            return False
 
-                self.client.table(self.embeddings_table).insert(embedding_data).execute()
+    def _get_insert_pool(self) -> ThreadPoolExecutor:
+        """Threads issuing concurrent inserts (created on first use)"""
+        if self._insert_pool is None:
+            self._insert_pool = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="db-insert"
+            )
+        return self._insert_pool
 
-            return True
+    def _insert_batch(self, file_id, batch, created_at: str) -> bool:
+        """
+        Insert a batch of (vector, chunk) pairs with one INSERT per table
+        (see _insert_rows for how failures are retried and isolated)
+        """
+        chunk_rows = self._insert_rows(self.chunks_table, [
+            {
+                "file_id": file_id,
+                "content": chunk.get("content", ""),
+                "metadata": chunk,
+                "created_at": created_at
+            }
+            for _, chunk in batch
+        ])
+
+        # Inserted rows come back in request order; skip chunks that failed
+        embedding_rows = [
+            {
+                "chunk_id": row["id"],
+                "file_id": file_id,
+                "embedding": vector,
+                "created_at": created_at
+            }
+            for row, (vector, _) in zip(chunk_rows, batch)
+            if row is not None
+        ]
+        inserted = self._insert_rows(self.embeddings_table, embedding_rows)
+        return len(embedding_rows) == len(batch) and None not in inserted
 
-        except Exception as e:
-            print(f"Error storing embeddings to database: {e}")
-            return False
+    def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Multi-row INSERT returning the inserted row (or None) for each input row.
+
+        The whole batch and single rows are retried with exponential backoff
+        (transient errors). A batch that still fails is split in half and each
+        half inserted separately, so one bad row only loses its sub-batch.
+        Splitting stops after INSERT_MAX_SPLIT_DEPTH halvings, and as soon as
+        both halves of a batch fail to reach the server (an outage costs a
+        handful of requests, not one per row).
+        """
+        return self._insert_or_split(table, rows, 0)[0]
+
+    def _attempt_insert(self, table: str, rows: List[Dict[str, Any]], attempts: int):
+        """(inserted rows, None) on success, else (None, last error)"""
+        error = None
+        for attempt in range(attempts):
+            try:
+                result = self.client.table(table).insert(rows).execute()
+                if not result.data or len(result.data) != len(rows):
+                    raise ValueError("insert returned an unexpected number of rows")
+                return result.data, None
+            except Exception as e:
+                error = e
+                if attempt + 1 < attempts:
+                    time.sleep(INSERT_BACKOFF_SECONDS * 2 ** attempt)
+        return None, error
+
+    def _insert_or_split(self, table: str, rows: List[Dict[str, Any]], depth: int):
+        """_insert_rows for one (sub-)batch, plus the error if every row failed"""
+        if not rows:
+            return [], None
+        attempts = INSERT_ATTEMPTS if depth == 0 or len(rows) == 1 else 1
+        inserted, error = self._attempt_insert(table, rows, attempts)
+        if inserted is not None:
+            return inserted, None
+
+        if len(rows) == 1 or depth >= INSERT_MAX_SPLIT_DEPTH:
+            logger.error(f"❌ Insert of {len(rows)} rows into {table} failed, {len(rows)} rows lost: {error}")
+            return [None] * len(rows), error
+
+        logger.warning(f"⚠️ Insert of {len(rows)} rows into {table} failed, splitting batch: {error}")
+        mid = len(rows) // 2
+        left, left_error = self._insert_or_split(table, rows[:mid], depth + 1)
+        if _is_connection_error(left_error):
+            # Probe the other half once before splitting it as well
+            right, right_error = self._attempt_insert(table, rows[mid:], 1)
+            if right is None and _is_connection_error(right_error):
+                logger.error(
+                    f"❌ Server unreachable, {len(rows) - mid} more rows lost for {table}: {right_error}"
+                )
+                return [None] * len(rows), right_error
+            if right is not None:
+                return left + right, None
+        right, right_error = self._insert_or_split(table, rows[mid:], depth + 1)
+        if left_error is not None and right_error is not None:
+            return left + right, right_error
+        return left + right, None
 
     def search_embeddings(self, 
                          query_embedding: np.ndarray, 
                          top_k: int = 5, 
-                         threshold: float = 0.7) -> List[Dict[str, Any]]:
+                         threshold: float = 0.7,
+                         exclude_questions: bool = False) -> List[Dict[str, Any]]:
         """Search for similar embeddings using database vector search"""
+        if self._use_match_rpc:
+            try:
+                # Postgres ranks with pgvector and returns only the top_k rows
+                result = self.client.rpc(MATCH_EMBEDDINGS_RPC, {
+                    "query_embedding": np.asarray(query_embedding, dtype=np.float32).ravel().tolist(),
+                    "match_threshold": threshold,
+                    "match_count": top_k,
+                }).execute()
+                matches = result.data or []
+                if exclude_questions:
+                    matches = [m for m in matches if is_document_match(m)]
+                return matches
+            except Exception as e:
+                logger.warning(f"⚠️ {MATCH_EMBEDDINGS_RPC} RPC failed, scanning embeddings client-side: {e}")
+                # PGRST202: the function isn't deployed, so stop trying it
+                if "PGRST202" in str(e):
+                    self._use_match_rpc = False
+
+        return self._scan_embeddings(query_embedding, top_k, threshold, exclude_questions)
+
+    def _scan_embeddings(self,
+                         query_embedding: np.ndarray,
+                         top_k: int,
+                         threshold: float,
+                         exclude_questions: bool) -> List[Dict[str, Any]]:
+        """Fallback search: fetch every embedding and rank them in Python"""
         try:
-            # Note: This is a simplified version
-            # In production, you'd use pgvector or similar for efficient vector search
-
             # Get all embeddings (not efficient for large datasets)
             embeddings_result = self.client.table(self.embeddings_table).select(
                 "*, chunks(content, metadata), files(file_path)"
@@ -110,33 +270,40 @@ class DatabaseEmbeddingStore(EmbeddingStore):
             if not embeddings_result.data:
                 return []
 
-            # Calculate similarities (this should be done in the database in production)
-            matches = []
-            for row in embeddings_result.data:
-                try:
-                    stored_embedding = np.array(row["embedding"])
-
-                    # Calculate cosine similarity
-                    similarity = np.dot(query_embedding, stored_embedding) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(stored_embedding)
-                    )
-
-                    if similarity >= threshold:
-                        chunk_data = row["chunks"]
-                        chunk_data["similarity"] = float(similarity)
-                        chunk_data["file_path"] = row["files"]["file_path"]
-                        matches.append(chunk_data)
+            # Stored vectors are unit length (see store_embeddings): normalize
+            # the query once and score every row in one matrix-vector product
+            query = np.asarray(query_embedding, dtype=np.float32).ravel()
+            query = query / (np.linalg.norm(query) + 1e-12)
+            rows = [
+                row for row in embeddings_result.data
+                if len(row.get("embedding") or ()) == len(query)
+            ]
+            if len(rows) < len(embeddings_result.data):
+                logger.error(f"❌ Skipped {len(embeddings_result.data) - len(rows)} malformed embeddings")
+            if not rows:
+                return []
+            similarities = np.asarray(
+                [row["embedding"] for row in rows], dtype=np.float32
+            ) @ query
 
-                except Exception as e:
-                    print(f"Error processing embedding: {e}")
-                    continue
+            # Top_k above threshold: partition out the best rows, sort only those
+            top = np.flatnonzero(similarities >= threshold)
+            if len(top) > top_k > 0:
+                top = top[np.argpartition(-similarities[top], top_k - 1)[:top_k]]
+            top = top[np.argsort(-similarities[top])][:max(top_k, 0)]
 
-            # Sort by similarity and return top_k
-            matches.sort(key=lambda x: x["similarity"], reverse=True)
-            return matches[:top_k]
+            matches = []
+            for i in top:
+                chunk_data = rows[i]["chunks"]
+                chunk_data["similarity"] = float(similarities[i])
+                chunk_data["file_path"] = rows[i]["files"]["file_path"]
+                matches.append(chunk_data)
+            if exclude_questions:
+                matches = [m for m in matches if is_document_match(m)]
+            return matches
 
         except Exception as e:
-            print(f"Error searching embeddings in database: {e}")
+            logger.error(f"❌ Error searching embeddings in database: {e}")
             return []
 
     def get_embedding_stats(self) -> Dict[str, Any]:
@@ -162,7 +329,7 @@ class DatabaseEmbeddingStore(EmbeddingStore):
             }
 
         except Exception as e:
-            print(f"Error getting database stats: {e}")
+            logger.error(f"❌ Error getting database stats: {e}")
             return {}
 
     def clear_embeddings(self, file_path: Optional[str] = None) -> bool:
@@ -195,7 +362,7 @@ class DatabaseEmbeddingStore(EmbeddingStore):
             return True
 
         except Exception as e:
-            print(f"Error clearing embeddings from database: {e}")
+            logger.error(f"❌ Error clearing embeddings from database: {e}")
             return False
 
     def embedding_exists(self, file_path: str) -> bool:
@@ -204,13 +371,5 @@ class DatabaseEmbeddingStore(EmbeddingStore):
             result = self.client.table(self.files_table).select("id").eq("file_path", file_path).execute()
             return bool(result.data)
         except Exception as e:
-            print(f"Error checking if embedding exists: {e}")
+            logger.error(f"❌ Error checking if embedding exists: {e}")
             return False
-
-    def _vector_search(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
-        """
-        Efficient vector search using pgvector (for production)
-        This is a placeholder for the actual implementation
-        """
-
-        return []
@@ -2,23 +2,59 @@
 Abstract base class and factory for embedding storage
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 from datetime import datetime
 
+# Per-chunk filter flags (see chunk_flags)
+STORE_KEY_FLAG = 1 << 0
+SHORT_CONTENT_FLAG = 1 << 1
+ENDS_WITH_QUESTION_FLAG = 1 << 2
+EMPTY_CONTENT_FLAG = 1 << 3
+# A stored user question has store_key, short content and a trailing '?'
+STORED_QUESTION_MASK = STORE_KEY_FLAG | SHORT_CONTENT_FLAG | ENDS_WITH_QUESTION_FLAG
+
+
+def chunk_flags(chunk: Dict[str, Any]) -> int:
+    """Bit flags describing a chunk's content, used to filter search results"""
+    content = chunk.get("content", "").strip()
+    store_key = (chunk.get("metadata") or {}).get("store_key")
+    return (
+        (STORE_KEY_FLAG if store_key else 0)
+        | (SHORT_CONTENT_FLAG if len(content) < 100 else 0)
+        | (ENDS_WITH_QUESTION_FLAG if content.endswith("?") else 0)
+        | (EMPTY_CONTENT_FLAG if not content else 0)
+    )
+
+
+def is_document_flags(flags):
+    """True where flags describe document content (works on ints and arrays)"""
+    return ((flags & STORED_QUESTION_MASK) != STORED_QUESTION_MASK) & (
+        (flags & EMPTY_CONTENT_FLAG) == 0
+    )
+
+
+def is_document_match(match: Dict[str, Any]) -> bool:
+    """
+    Check if a search match is document content rather than a stored user
+    question (store_key present, short, ends with '?') or an empty chunk
+    """
+    return bool(is_document_flags(chunk_flags(match)))
+
+
 class EmbeddingStore(ABC):
     """Abstract base class for embedding storage"""
     
     @abstractmethod
     def store_embeddings(self, 
-                        embeddings: List[np.ndarray], 
+                        embeddings: Union[np.ndarray, List[np.ndarray]], 
                         chunks: List[Dict[str, Any]], 
                         metadata: Dict[str, Any]) -> bool:
         """
         Store embeddings with associated chunks and metadata
         
         Args:
-            embeddings: List of embedding vectors
+            embeddings: (n, dim) matrix or list of n embedding vectors
             chunks: List of text chunks with metadata
             metadata: Additional metadata (file info, etc.)
             
@@ -26,12 +62,26 @@ class EmbeddingStore(ABC):
             bool: True if successful
         """
         pass
+
+    def store_embedding_sets(self,
+                             embedding_sets: List[Tuple[List[np.ndarray], List[Dict[str, Any]], Dict[str, Any]]]) -> bool:
+        """
+        Store several (embeddings, chunks, metadata) sets, one per file
+
+        Stores that persist everything on each write override this to
+        write once for the whole batch.
+
+        Returns:
+            bool: True if every set was stored
+        """
+        return all([self.store_embeddings(*embedding_set) for embedding_set in embedding_sets])
     
     @abstractmethod
     def search_embeddings(self, 
                          query_embedding: np.ndarray, 
                          top_k: int = 5, 
-                         threshold: float = 0.7) -> List[Dict[str, Any]]:
+                         threshold: float = 0.7,
+                         exclude_questions: bool = False) -> List[Dict[str, Any]]:
         """
         Search for similar embeddings
         
@@ -39,6 +89,8 @@ class EmbeddingStore(ABC):
             query_embedding: Query vector
             top_k: Number of results to return
             threshold: Similarity threshold
+            exclude_questions: Drop stored user questions and empty chunks
+                from the top_k results (see is_document_match)
             
         Returns:
             List of matching chunks with similarity scores
@@ -1,16 +1,187 @@
 """
 Local file-based embedding storage for open source version
 """
+import io
 import os
-import json
+import orjson
 import pickle
+import threading
 import numpy as np
+from numpy.lib import format as npy_format
+from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
-from sklearn.metrics.pairwise import cosine_similarity
 
-from .embedding_store import EmbeddingStore
+from .embedding_store import EmbeddingStore, chunk_flags, is_document_flags
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Scan an int8 copy of the matrix (then rerank in float32) above this many rows
+QUANTIZED_SEARCH_MIN_ROWS = 1024
+# Candidates kept from the int8 scan per requested result
+RERANK_FACTOR = 4
+# Split the scan into one row block per core above this many rows
+PARALLEL_SEARCH_MIN_ROWS = 65536
+
+_SCAN_WORKERS = os.cpu_count() or 1
+_scan_pool = None
+
+
+def _get_scan_pool() -> ThreadPoolExecutor:
+    """Threads for block-parallel scans (BLAS and SimSIMD release the GIL)"""
+    global _scan_pool
+    if _scan_pool is None:
+        _scan_pool = ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix="scan")
+    return _scan_pool
+
+
+def _top_rows(score_block, n: int, m: int):
+    """
+    Rows (and scores) of the m best-scoring rows out of n, unordered.
+
+    ``score_block(lo, hi)`` scores rows lo..hi-1. Large scans are split into
+    one block per core; each block keeps its own top m and the survivors are
+    merged, so only ``workers * m`` scores cross threads.
+    """
+    if n < PARALLEL_SEARCH_MIN_ROWS or _SCAN_WORKERS == 1:
+        rows, scores = np.arange(n), score_block(0, n)
+    else:
+        bounds = np.linspace(0, n, _SCAN_WORKERS + 1, dtype=np.int64)
+
+        def block_top(lo, hi):
+            block_scores = score_block(lo, hi)
+            if hi - lo > m:
+                idx = np.argpartition(-block_scores, m - 1)[:m]
+                return idx + lo, block_scores[idx]
+            return np.arange(lo, hi), block_scores
+
+        parts = list(_get_scan_pool().map(block_top, bounds[:-1], bounds[1:]))
+        rows = np.concatenate([p[0] for p in parts])
+        scores = np.concatenate([p[1] for p in parts])
+
+    if len(rows) > m:
+        idx = np.argpartition(-scores, m - 1)[:m]
+        rows, scores = rows[idx], scores[idx]
+    return rows, scores
+
+
+def _append_npy(path: Path, rows: np.ndarray, saved: int) -> bool:
+    """
+    Append rows to the .npy file at path, which must hold exactly ``saved``
+    rows of the same dtype and row shape, in place: the rows are written past
+    the end of the data before the header's shape is updated (a crash in
+    between leaves the old, still valid, file). False if the file can't be
+    extended this way (the caller rewrites it atomically; shrinking in place
+    could fault readers still mapping the old rows).
+    """
+    rows = np.ascontiguousarray(rows)
+    try:
+        with open(path, "r+b") as f:
+            version = npy_format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_2_0(f)
+            else:
+                return False
+            data_offset = f.tell()
+            if shape != (saved, *rows.shape[1:]) or fortran_order or dtype != rows.dtype:
+                return False
+
+            # The new header must fit the old one's (64-byte padded) space
+            header = io.BytesIO()
+            header_fields = {
+                "descr": npy_format.dtype_to_descr(rows.dtype),
+                "fortran_order": False,
+                "shape": (saved + len(rows), *rows.shape[1:]),
+            }
+            if version == (1, 0):
+                npy_format.write_array_header_1_0(header, header_fields)
+            else:
+                npy_format.write_array_header_2_0(header, header_fields)
+            if header.tell() != data_offset:
+                return False
+
+            # Drop anything past the saved rows (a torn earlier append)
+            f.truncate(data_offset + saved * rows.dtype.itemsize * int(np.prod(rows.shape[1:])))
+            f.seek(0, os.SEEK_END)
+            f.write(rows.data)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(header.getvalue())
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not append to {path.name}, rewriting it: {e}")
+        return False
+
+
+def _json_lines(records: List[Dict[str, Any]]) -> bytes:
+    """One JSON object per line"""
+    return b"".join(
+        orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+        for record in records
+    )
+
+
+def _load_json_lines(data: bytes) -> List[Dict[str, Any]]:
+    """Parse one JSON object per line, dropping a torn last line (interrupted append)"""
+    data = data.rstrip(b"\n")
+    if not data:
+        return []
+    try:
+        # One parse for the whole file (orjson escapes newlines inside strings)
+        return orjson.loads(b"[" + data.replace(b"\n", b",") + b"]")
+    except orjson.JSONDecodeError:
+        lines = data.split(b"\n")
+        records = [orjson.loads(line) for line in lines[:-1]]
+        try:
+            records.append(orjson.loads(lines[-1]))
+        except orjson.JSONDecodeError:
+            logger.warning("⚠️ Dropped an incomplete chunk record at the end of chunks.jsonl")
+        return records
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def dot_scores(matrix, query):
+        """matrix @ query, rows spread over threads (SIMD inner loop)"""
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for i in numba.prange(matrix.shape[0]):
+            s = np.float32(0.0)
+            for j in range(matrix.shape[1]):
+                s += matrix[i, j] * query[j]
+            scores[i] = s
+        return scores
+
+else:
+    dot_scores = None
+
+
+def quantize_int8(matrix: np.ndarray):
+    """Symmetric per-row int8 quantization, so that row ~= q * scale"""
+    matrix = np.atleast_2d(matrix)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
 
 class LocalEmbeddingStore(EmbeddingStore):
     """Local file-based embedding storage"""
@@ -19,34 +190,98 @@ class LocalEmbeddingStore(EmbeddingStore):
         self.storage_path = Path(config.get("path", "data/embeddings/"))
         self.storage_path.mkdir(parents=True, exist_ok=True)
 
-        # File paths
-        self.embeddings_file = self.storage_path / "embeddings.pkl"
-        self.chunks_file = self.storage_path / "chunks.json"
+        # File paths (embeddings.pkl is the legacy list-of-vectors format,
+        # migrated to embeddings.npy on load; chunks.json, a single JSON
+        # array, is migrated to one JSON line per chunk in chunks.jsonl)
+        self.embeddings_file = self.storage_path / "embeddings.npy"
+        self.legacy_embeddings_file = self.storage_path / "embeddings.pkl"
+        self.chunks_file = self.storage_path / "chunks.jsonl"
+        self.legacy_chunks_file = self.storage_path / "chunks.json"
         self.metadata_file = self.storage_path / "metadata.json"
+        # int8 sidecar of the search matrix for the quantized scan (rebuilt
+        # when older than embeddings.npy)
+        self.quantized_file = self.storage_path / "embeddings.int8.npy"
+        self.scales_file = self.storage_path / "embeddings.scales.npy"
+
+        # Layout: self.embeddings (N, D) and self.chunks (N dicts) are parallel,
+        # row i of one describes row i of the other, and every file owns the
+        # contiguous rows start_idx..end_idx of both (see self.metadata).
+        # Searches only read the matrix; chunk dicts are copied for the top k.
+
+        # Stacked, L2-normalized float32 copy of self.embeddings for search,
+        # plus its int8 quantization, a copy on the model's GPU and per-chunk
+        # filter flags (built on demand, dropped on every write)
+        self._matrix = None
+        self._quantized = None
+        self._device_matrix = None
+        self._doc_flags = None
+        # Rows are stored unit length; files from older versions are checked
+        # (and normalized in memory) once per load
+        self._unit_rows = False
+        # Growable (capacity-doubling) buffer behind self.embeddings between
+        # saves, so adding many files copies the matrix O(log n) times
+        self._buffer = None
+        # Rows added to a store that is still just the saved embeddings.npy
+        # map: kept aside (and appended to the file on save) instead of
+        # copying the whole map into the buffer; merged only by writes
+        self._tail: List[np.ndarray] = []
+        self._tail_rows = 0
+        # Leading rows of self.embeddings that embeddings.npy already holds
+        # (saves that only add rows append to the file instead of rewriting it),
+        # and likewise leading chunks already in chunks.jsonl
+        self._saved_rows = 0
+        self._saved_chunks = 0
+
+        # Held by every write and search: writes touch the matrix, chunks and
+        # cached search state in several steps (the background writer thread
+        # stores while request threads search)
+        self._lock = threading.RLock()
 
         # Load existing data
         self._load_data()
 
     def _load_data(self):
         """Load existing embeddings and chunks from files"""
-        # Load embeddings
+        self._matrix = None
+        self._quantized = None
+        self._device_matrix = None
+        self._doc_flags = None
+        self._unit_rows = False
+        self._saved_rows = 0
+
+        # Load embeddings: one (N, D) float32 matrix, memory-mapped read-only
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
         if self.embeddings_file.exists():
             try:
-                with open(self.embeddings_file, 'rb') as f:
-                    self.embeddings = pickle.load(f)
+                self.embeddings = np.load(self.embeddings_file, mmap_mode="r")
+                self._saved_rows = len(self.embeddings)
             except Exception as e:
-                print(f"Warning: Could not load embeddings: {e}")
-                self.embeddings = []
-        else:
-            self.embeddings = []
+                logger.warning(f"⚠️ Could not load embeddings: {e}")
+        elif self.legacy_embeddings_file.exists():
+            try:
+                with open(self.legacy_embeddings_file, 'rb') as f:
+                    legacy = pickle.load(f)
+                if len(legacy):
+                    self.embeddings = np.asarray(legacy, dtype=np.float32)
+                    self._save_embeddings()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load embeddings: {e}")
 
         # Load chunks
-        if self.chunks_file.exists():
+        self._saved_chunks = 0
+        if self.chunks_file.exists() or self.legacy_chunks_file.exists():
             try:
-                with open(self.chunks_file, 'r', encoding='utf-8') as f:
-                    self.chunks = json.load(f)
+                if self.chunks_file.exists():
+                    self.chunks = _load_json_lines(self.chunks_file.read_bytes())
+                    self._saved_chunks = len(self.chunks)
+                else:
+                    self.chunks = orjson.loads(self.legacy_chunks_file.read_bytes())
+                # Row positions come from the file ranges in metadata; older
+                # stores also kept a per-chunk copy that removals rewrote
+                for chunk in self.chunks:
+                    chunk.pop("embedding_idx", None)
             except Exception as e:
-                print(f"Warning: Could not load chunks: {e}")
+                logger.warning(f"⚠️ Could not load chunks: {e}")
                 self.chunks = []
         else:
             self.chunks = []
@@ -54,153 +289,483 @@ class LocalEmbeddingStore(EmbeddingStore):
         # Load metadata
         if self.metadata_file.exists():
             try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
+                self.metadata = orjson.loads(self.metadata_file.read_bytes())
             except Exception as e:
-                print(f"Warning: Could not load metadata: {e}")
+                logger.warning(f"⚠️ Could not load metadata: {e}")
                 self.metadata = {}
         else:
             self.metadata = {}
 
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        (N, D) float32 matrix, one row per chunk. Reading never changes the
+        store: rows still set aside for the next save (only left over when a
+        save failed) are included in a copy
+        """
+        if self._tail:
+            return np.concatenate([self._embeddings, *self._tail])
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, value: np.ndarray):
+        self._embeddings = value
+        self._tail, self._tail_rows = [], 0
+
+    def row_count(self) -> int:
+        """Number of stored rows (cheaper than len(self.embeddings))"""
+        return len(self._embeddings) + self._tail_rows
+
+    def _merge_tail(self):
+        """Move rows set aside by _append_rows into the matrix (write path only)"""
+        if self._tail:
+            tail = np.concatenate(self._tail)
+            self._tail, self._tail_rows = [], 0
+            self._append_rows(tail, defer=False)
+
+    def _get_matrix(self) -> np.ndarray:
+        """Search matrix: one C-contiguous float32 row per embedding, L2-normalized"""
+        if self._matrix is None:
+            if not self._unit_rows:
+                self._normalize_rows()
+            # Rows are unit length: search the memory-mapped matrix in place
+            # (SimSIMD and BLAS read it zero-copy)
+            self._matrix = np.ascontiguousarray(self.embeddings, dtype=np.float32)
+        return self._matrix
+
+    def _normalize_rows(self):
+        """Make sure every stored row is unit length (stores written before rows were normalized on insert)"""
+        if self.row_count():
+            norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+            if not np.allclose(norms, 1.0, atol=1e-4):
+                norms[norms == 0] = 1.0
+                # Persisted normalized with the next write
+                self.embeddings = np.asarray(self.embeddings, dtype=np.float32) / norms
+                self._saved_rows = 0
+        self._unit_rows = True
+
+    def _similarities(self, query: np.ndarray, lo: int = 0, hi: Optional[int] = None) -> np.ndarray:
+        """Dot product of a normalized float32 query with search matrix rows lo..hi-1"""
+        matrix = self._get_matrix()[lo:hi]
+        if simsimd is not None:
+            # SIMD kernels (AVX-512/NEON) picked at runtime for the host CPU
+            return np.asarray(simsimd.cdist(query[None, :], matrix, metric="dot")).ravel()
+        if dot_scores is not None:
+            return dot_scores(matrix, query)
+        return matrix @ query
+
+    def _get_device_matrix(self, device, dtype):
+        """Search matrix resident on ``device`` (for queries embedded on the GPU)"""
+        matrix = self._device_matrix
+        if matrix is None or matrix.device != device or matrix.dtype != dtype:
+            matrix = torch.from_numpy(np.array(self._get_matrix())).to(device=device, dtype=dtype)
+            self._device_matrix = matrix
+        return matrix
+
+    def _device_similarities(self, query, k: int):
+        """
+        Top k rows for a query tensor, scored on its device; only the k
+        (row, similarity) pairs are copied back to the host
+        """
+        query = query.flatten()
+        matrix = self._get_device_matrix(query.device, query.dtype)
+        query = query / query.norm().clamp_min(1e-12)
+        scores, rows = torch.topk(matrix @ query, k)
+        return rows.cpu().numpy(), scores.float().cpu().numpy()
+
+    def _get_quantized(self):
+        """int8 copy of the search matrix and its per-row scales"""
+        if self._quantized is None:
+            self._quantized = self._load_quantized()
+            if self._quantized is None:
+                self._quantized = quantize_int8(self._get_matrix())
+                self._save_quantized(*self._quantized)
+        return self._quantized
+
+    def _load_quantized(self):
+        """Memory-map the int8 sidecar if it is current, else None"""
+        try:
+            if (
+                self.quantized_file.stat().st_mtime_ns <= self.embeddings_file.stat().st_mtime_ns
+                or self.scales_file.stat().st_mtime_ns <= self.embeddings_file.stat().st_mtime_ns
+            ):
+                return None
+            q_matrix = np.load(self.quantized_file, mmap_mode="r")
+            scales = np.load(self.scales_file, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if len(q_matrix) != self.row_count() or len(scales) != self.row_count():
+            return None
+        return q_matrix, scales
+
+    def _save_quantized(self, q_matrix: np.ndarray, scales: np.ndarray):
+        """Persist the int8 sidecar (a quarter of the float32 matrix's size)"""
+        try:
+            for path, array in ((self.quantized_file, q_matrix), (self.scales_file, scales)):
+                tmp_file = path.with_suffix(".tmp.npy")
+                np.save(tmp_file, array)
+                os.replace(tmp_file, path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save quantized embeddings: {e}")
+
+    def _get_doc_flags(self) -> np.ndarray:
+        """uint8 chunk_flags for every chunk, aligned with the search matrix"""
+        if self._doc_flags is None:
+            self._doc_flags = np.fromiter(
+                (chunk_flags(chunk) for chunk in self.chunks),
+                dtype=np.uint8,
+                count=len(self.chunks),
+            )
+        return self._doc_flags
+
+    def _candidate_similarities(self, query: np.ndarray, k: int):
+        """
+        Similarities for a set of rows guaranteed to hold the (approximate) top k.
+
+        Large stores are scanned in int8 (4x less memory traffic) and only the
+        best ``k * RERANK_FACTOR`` rows are rescored in float32. Very large
+        stores are scanned block-parallel (see _top_rows). Returns
+        (row indices, float32-exact similarities).
+        """
+        n = self.row_count()
+        if simsimd is None or n < QUANTIZED_SEARCH_MIN_ROWS:
+            return _top_rows(lambda lo, hi: self._similarities(query, lo, hi), n, k)
+
+        q_matrix, scales = self._get_quantized()
+        q_query, q_scale = quantize_int8(query)
+
+        def approx(lo, hi):
+            scores = np.asarray(simsimd.cdist(q_query, q_matrix[lo:hi], metric="dot")).ravel()
+            scores *= scales[lo:hi] * q_scale[0]
+            return scores
+
+        candidates, _ = _top_rows(approx, n, min(n, k * RERANK_FACTOR))
+        return candidates, self._get_matrix()[candidates] @ query
+
+    def _save_embeddings(self) -> bool:
+        """
+        Write embeddings.npy (appending when only rows were added) and re-map
+        it read-only. Returns True if rows were appended to the existing file.
+        """
+        saved = self._saved_rows
+        if self._tail and len(self._embeddings) == saved:
+            # Only rows added since the last save: append just those
+            new_rows = np.concatenate(self._tail)
+        else:
+            self._merge_tail()
+            new_rows = np.asarray(self.embeddings[saved:], dtype=np.float32)
+        appended = bool(saved) and _append_npy(self.embeddings_file, new_rows, saved)
+        if not appended:
+            # Atomic full rewrite
+            tmp_file = self.embeddings_file.with_suffix(".tmp.npy")
+            np.save(tmp_file, np.ascontiguousarray(self.embeddings, dtype=np.float32))
+            os.replace(tmp_file, self.embeddings_file)
+        self.embeddings = np.load(self.embeddings_file, mmap_mode="r")
+        self._buffer = None
+        self._saved_rows = len(self.embeddings)
+        return appended
+
+    def _extend_quantized(self, quantized, saved: int):
+        """int8 sidecar for the first ``saved`` rows plus newly quantized appended rows"""
+        new_rows, new_scales = quantize_int8(np.asarray(self.embeddings[saved:]))
+        if _append_npy(self.quantized_file, new_rows, saved) and _append_npy(
+            self.scales_file, new_scales, saved
+        ):
+            return (
+                np.load(self.quantized_file, mmap_mode="r"),
+                np.load(self.scales_file, mmap_mode="r"),
+            )
+        q_matrix = np.concatenate([quantized[0], new_rows])
+        scales = np.concatenate([quantized[1], new_scales])
+        self._save_quantized(q_matrix, scales)
+        return q_matrix, scales
+
+    def _save_chunks(self):
+        """Write chunks.jsonl, appending only new chunks when nothing before them changed"""
+        saved = self._saved_chunks
+        if not (saved and self._append_chunk_lines(_json_lines(self.chunks[saved:]))):
+            # Atomic full rewrite
+            tmp_file = self.chunks_file.with_suffix(".tmp.jsonl")
+            tmp_file.write_bytes(_json_lines(self.chunks))
+            os.replace(tmp_file, self.chunks_file)
+            if self.legacy_chunks_file.exists():
+                self.legacy_chunks_file.unlink()
+        self._saved_chunks = len(self.chunks)
+
+    def _append_chunk_lines(self, lines: bytes) -> bool:
+        """Append to chunks.jsonl if it ends on a complete line (False means rewrite it)"""
+        try:
+            with open(self.chunks_file, "r+b") as f:
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        return False
+                f.write(lines)
+            return True
+        except OSError:
+            return False
+
     def _save_data(self):
         """Save embeddings and chunks to files"""
+        # Any write invalidates the search matrices (an int8 sidecar covering
+        # every saved row is extended instead when rows were only appended)
+        saved = self._saved_rows
+        quantized = self._quantized
+        doc_flags = self._doc_flags
+        self._matrix = None
+        self._quantized = None
+        self._device_matrix = None
+        self._doc_flags = None
         try:
             # Save embeddings
-            with open(self.embeddings_file, 'wb') as f:
-                pickle.dump(self.embeddings, f)
+            appended = self._save_embeddings()
+            if appended and quantized is not None and len(quantized[0]) == saved:
+                self._quantized = self._extend_quantized(quantized, saved)
+            if appended and doc_flags is not None and len(doc_flags) == saved:
+                self._doc_flags = np.concatenate([
+                    doc_flags,
+                    np.fromiter(
+                        (chunk_flags(chunk) for chunk in self.chunks[saved:]),
+                        dtype=np.uint8,
+                        count=len(self.chunks) - saved,
+                    ),
+                ])
 
             # Save chunks
-            with open(self.chunks_file, 'w', encoding='utf-8') as f:
-                json.dump(self.chunks, f, indent=2, ensure_ascii=False)
+            self._save_chunks()
 
             # Save metadata
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+            self.metadata_file.write_bytes(
+                orjson.dumps(self.metadata, option=orjson.OPT_SERIALIZE_NUMPY)
+            )
 
             return True
         except Exception as e:
-            print(f"Error saving data: {e}")
+            logger.error(f"❌ Error saving data: {e}")
             return False
 
     def store_embeddings(self, 
-                        embeddings: List[np.ndarray], 
+                        embeddings: Union[np.ndarray, List[np.ndarray]], 
                         chunks: List[Dict[str, Any]], 
                         metadata: Dict[str, Any]) -> bool:
         """Store embeddings with associated chunks and metadata"""
         try:
-            # Get file path for tracking
-            file_path = metadata.get("file_path", "unknown")
-
-            # Remove existing embeddings for this file
-            if file_path in self.metadata:
-                self._remove_file_embeddings(file_path)
-
-            # Add new embeddings
-            start_idx = len(self.embeddings)
-            self.embeddings.extend(embeddings)
-
-            # Add chunks with additional metadata
-            for i, chunk in enumerate(chunks):
-                chunk_with_meta = chunk.copy()
-                chunk_with_meta.update({
-                    "embedding_idx": start_idx + i,
-                    "file_path": file_path,
-                    "stored_at": datetime.now().isoformat()
-                })
-                self.chunks.append(chunk_with_meta)
+            with self._lock:
+                self._add_embeddings(embeddings, chunks, metadata)
 
-            # Update metadata
-            self.metadata[file_path] = {
-                "chunk_count": len(chunks),
-                "start_idx": start_idx,
-                "end_idx": start_idx + len(chunks) - 1,
-                "stored_at": datetime.now().isoformat(),
-                **metadata
-            }
+                # Save to files
+                return self._save_data()
+
+        except Exception as e:
+            logger.error(f"❌ Error storing embeddings: {e}")
+            return False
 
-            # Save to files
-            return self._save_data()
+    def store_embedding_sets(self, embedding_sets) -> bool:
+        """Store several files' embeddings, rewriting the store files once"""
+        try:
+            with self._lock:
+                for embeddings, chunks, metadata in embedding_sets:
+                    self._add_embeddings(embeddings, chunks, metadata)
+                return self._save_data()
 
         except Exception as e:
-            print(f"Error storing embeddings: {e}")
+            logger.error(f"❌ Error storing embeddings: {e}")
             return False
 
+    def _add_embeddings(self, embeddings, chunks, metadata):
+        """Add one file's embeddings in memory (replacing any earlier ones)"""
+        # Get file path for tracking
+        file_path = metadata.get("file_path", "unknown")
+
+        # Remove existing embeddings for this file (the caller saves)
+        if file_path in self.metadata:
+            self._remove_file_embeddings(file_path, save=False)
+
+        # Add new embeddings
+        start_idx = self.row_count()
+        new_rows = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        # Normalized once here, so searches never rescale the matrix
+        norms = np.linalg.norm(new_rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        new_rows = new_rows / norms
+        self._append_rows(new_rows)
+
+        # Add chunks with additional metadata (a chunk's row is its position;
+        # no per-chunk index to rewrite when earlier files are removed)
+        stored_at = datetime.now().isoformat()
+        for chunk in chunks:
+            chunk_with_meta = chunk.copy()
+            chunk_with_meta.update({
+                "file_path": file_path,
+                "stored_at": stored_at
+            })
+            self.chunks.append(chunk_with_meta)
+
+        # Update metadata
+        self.metadata[file_path] = {
+            "chunk_count": len(chunks),
+            "start_idx": start_idx,
+            "end_idx": start_idx + len(chunks) - 1,
+            "stored_at": stored_at,
+            **metadata
+        }
+
+    def _append_rows(self, new_rows: np.ndarray, defer: bool = True):
+        """Append rows to self.embeddings through the capacity-doubling buffer"""
+        if (
+            defer
+            and self._buffer is None
+            and self._saved_rows
+            and len(self._embeddings) == self._saved_rows
+        ):
+            # Still the saved file's map: set the rows aside for the next save
+            self._tail.append(new_rows)
+            self._tail_rows += len(new_rows)
+            return
+        n = len(self.embeddings)
+        needed = n + len(new_rows)
+        buffer = self._buffer
+        if (
+            buffer is None
+            or self.embeddings.base is not buffer
+            or len(buffer) < needed
+            or buffer.shape[1] != new_rows.shape[1]
+        ):
+            buffer = np.empty((max(needed, 2 * n, 16), new_rows.shape[1]), dtype=np.float32)
+            if n:
+                buffer[:n] = self.embeddings
+            self._buffer = buffer
+        buffer[n:needed] = new_rows
+        self.embeddings = buffer[:needed]
+
     def search_embeddings(self, 
                          query_embedding: np.ndarray, 
                          top_k: int = 5, 
-                         threshold: float = 0.7) -> List[Dict[str, Any]]:
+                         threshold: float = 0.7,
+                         exclude_questions: bool = False) -> List[Dict[str, Any]]:
         """Search for similar embeddings"""
-        if not self.embeddings:
-            return []
+        with self._lock:
+            if not self.row_count():
+                return []
 
-        try:
-            # Convert embeddings to numpy array
-            embeddings_array = np.array(self.embeddings)
-            query_embedding = query_embedding.reshape(1, -1)
-
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, embeddings_array)[0]
-
-            # Get top matches above threshold
-            matches = []
-            for i, similarity in enumerate(similarities):
-                if similarity >= threshold:
-                    chunk = self.chunks[i].copy()
+            try:
+                k = min(top_k, self.row_count())
+                if k <= 0:
+                    return []
+
+                if torch is not None and isinstance(query_embedding, torch.Tensor):
+                    # Query still on the GPU: score there against a resident matrix
+                    rows, similarities = self._device_similarities(query_embedding, k)
+                else:
+                    query = np.asarray(query_embedding, dtype=np.float32).ravel()
+                    query_norm = np.linalg.norm(query)
+                    if query_norm > 0:
+                        query = query / query_norm
+
+                    # Cosine similarity against every (candidate) row in one pass
+                    rows, similarities = self._candidate_similarities(query, k)
+
+                # Top-k without sorting the whole array
+                top_idx = np.argpartition(-similarities, k - 1)[:k]
+                top_idx = top_idx[np.argsort(-similarities[top_idx])]
+
+                # Keep matches above threshold (top_idx is sorted, so cut at the first miss)
+                top_idx = top_idx[:np.searchsorted(-similarities[top_idx], -threshold, side="right")]
+
+                if exclude_questions:
+                    top_idx = top_idx[is_document_flags(self._get_doc_flags()[rows[top_idx]])]
+
+                matches = []
+                for j in top_idx:
+                    similarity = similarities[j]
+                    chunk = self.chunks[rows[j]].copy()
                     chunk["similarity"] = float(similarity)
                     matches.append(chunk)
 
-            # Sort by similarity and return top_k
-            matches.sort(key=lambda x: x["similarity"], reverse=True)
-            return matches[:top_k]
+                return matches
 
-        except Exception as e:
-            print(f"Error searching embeddings: {e}")
-            return []
+            except Exception as e:
+                logger.error(f"❌ Error searching embeddings: {e}")
+                return []
+
+    def try_search_embeddings(self,
+                              query_embedding: np.ndarray,
+                              top_k: int = 5,
+                              threshold: float = 0.7,
+                              exclude_questions: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """search_embeddings without waiting: None if a write holds the store"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self.search_embeddings(query_embedding, top_k, threshold, exclude_questions)
+        finally:
+            self._lock.release()
 
     def get_embedding_stats(self) -> Dict[str, Any]:
         """Get statistics about stored embeddings"""
-        try:
-            # Calculate file sizes
-            total_size = 0
-            for file_path in [self.embeddings_file, self.chunks_file, self.metadata_file]:
-                if file_path.exists():
-                    total_size += file_path.stat().st_size
-
-            return {
-                "total_embeddings": len(self.embeddings),
-                "total_chunks": len(self.chunks),
-                "total_files": len(self.metadata),
-                "storage_size_mb": round(total_size / (1024 * 1024), 2),
-                "storage_path": str(self.storage_path),
-                "files": list(self.metadata.keys()),
-                "storage_mode": "local",
-            }
-        except Exception as e:
-            print(f"Error getting stats: {e}")
-            return {}
+        with self._lock:
+            try:
+                # Calculate file sizes
+                total_size = 0
+                for file_path in [self.embeddings_file, self.chunks_file, self.metadata_file]:
+                    if file_path.exists():
+                        total_size += file_path.stat().st_size
+
+                return {
+                    "total_embeddings": self.row_count(),
+                    "total_chunks": len(self.chunks),
+                    "total_files": len(self.metadata),
+                    "storage_size_mb": round(total_size / (1024 * 1024), 2),
+                    "storage_path": str(self.storage_path),
+                    "files": list(self.metadata.keys()),
+                    "storage_mode": "local",
+                }
+            except Exception as e:
+                logger.error(f"❌ Error getting stats: {e}")
+                return {}
 
     def clear_embeddings(self, file_path: Optional[str] = None) -> bool:
         """Clear embeddings (all or for specific file)"""
         try:
-            if file_path:
-                # Clear specific file
-                return self._remove_file_embeddings(file_path)
-            else:
-                # Clear all
-                self.embeddings = []
-                self.chunks = []
-                self.metadata = {}
-                return self._save_data()
+            with self._lock:
+                if file_path:
+                    # Clear specific file
+                    return self._remove_file_embeddings(file_path)
+                else:
+                    # Clear all
+                    self.embeddings = np.empty((0, 0), dtype=np.float32)
+                    self._saved_rows = 0
+                    self._saved_chunks = 0
+                    self.chunks = []
+                    self.metadata = {}
+                    return self._save_data()
         except Exception as e:
-            print(f"Error clearing embeddings: {e}")
+            logger.error(f"❌ Error clearing embeddings: {e}")
             return False
 
     def embedding_exists(self, file_path: str) -> bool:
         """Check if embeddings exist for a file"""
         return file_path in self.metadata
 
-    def _remove_file_embeddings(self, file_path: str) -> bool:
-        """Remove embeddings for a specific file"""
+    def file_slices(self) -> List[tuple]:
+        """
+        (file_path, metadata, chunks, embeddings) for every stored file, taken
+        under the lock so no concurrent write can misalign them
+        """
+        with self._lock:
+            embeddings = self.embeddings
+            return [
+                (
+                    file_path,
+                    dict(meta),
+                    self.chunks[meta["start_idx"] : meta["end_idx"] + 1],
+                    embeddings[meta["start_idx"] : meta["end_idx"] + 1],
+                )
+                for file_path, meta in self.metadata.items()
+            ]
+
+    def _remove_file_embeddings(self, file_path: str, save: bool = True) -> bool:
+        """Remove embeddings for a specific file (save=False leaves the files to the caller)"""
         if file_path not in self.metadata:
             return True
 
@@ -210,10 +775,13 @@ class LocalEmbeddingStore(EmbeddingStore):
             end_idx = file_meta["end_idx"]
 
             # Remove embeddings
-            del self.embeddings[start_idx:end_idx + 1]
+            self._merge_tail()
+            self.embeddings = np.delete(self.embeddings, np.s_[start_idx:end_idx + 1], axis=0)
+            self._saved_rows = min(self._saved_rows, start_idx)
 
-            # Remove chunks
-            self.chunks = [chunk for chunk in self.chunks if chunk.get("file_path") != file_path]
+            # Remove chunks: the same contiguous slice (no per-chunk comparisons)
+            self.chunks = self.chunks[:start_idx] + self.chunks[end_idx + 1:]
+            self._saved_chunks = 0  # chunks.jsonl still holds the removed lines
 
             # Update metadata
             del self.metadata[file_path]
@@ -221,19 +789,15 @@ class LocalEmbeddingStore(EmbeddingStore):
             # Update indices for remaining files
             self._update_indices_after_removal(start_idx, end_idx - start_idx + 1)
 
-            return self._save_data()
+            return self._save_data() if save else True
 
         except Exception as e:
-            print(f"Error removing file embeddings: {e}")
+            logger.error(f"❌ Error removing file embeddings: {e}")
             return False
 
     def _update_indices_after_removal(self, removed_start: int, removed_count: int):
-        """Update embedding indices after removal"""
+        """Shift the row ranges of files stored after the removed rows (O(files))"""
         for file_path, meta in self.metadata.items():
             if meta["start_idx"] > removed_start:
                 meta["start_idx"] -= removed_count
                 meta["end_idx"] -= removed_count
-
-        for chunk in self.chunks:
-            if chunk.get("embedding_idx", 0) > removed_start:
-                chunk["embedding_idx"] -= removed_count
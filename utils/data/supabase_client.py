@@ -1,7 +1,8 @@
 import os
+from functools import lru_cache
 
 from dotenv import load_dotenv
-from supabase import create_client
+from supabase import create_client, Client
 from pathlib import Path
 
 env_file = Path(".env")
@@ -9,9 +10,18 @@ if env_file.exists():
     load_dotenv(override=True)
 
 
+@lru_cache(maxsize=None)
+def get_shared_client(url: str, key: str) -> Client:
+    """
+    One client per project for the whole process, so every table/RPC call
+    reuses the same HTTP connection pool (and its keep-alive connections)
+    """
+    return create_client(url, key)
+
+
 def get_supabase_client():
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise RuntimeError("Supabase credentials missing")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return get_shared_client(SUPABASE_URL, SUPABASE_KEY)
@@ -1,3 +1,5 @@
+import threading
+
 from loguru import logger
 
 class SyncEmbeddingStore:
@@ -6,6 +8,7 @@ class SyncEmbeddingStore:
         self.db = db_store
         self.db_enabled = db_store is not None
         self.sync_queue = []  # Track failed syncs
+        self._queue_lock = threading.Lock()  # sync_pending runs off the event loop
         self.local_store = local_store
         self.db_store = db_store
 
@@ -24,15 +27,19 @@ class SyncEmbeddingStore:
             except Exception as db_err:
                 logger.warning(f"DB write failed for {embedding_id}: {db_err}")
                 if local_success:
-                    self.sync_queue.append(embedding_id)
+                    with self._queue_lock:
+                        self.sync_queue.append(embedding_id)
 
     def sync_pending(self):
         """Retry failed DB writes"""
         if not self.db_enabled:
             return
 
+        with self._queue_lock:
+            pending, self.sync_queue = self.sync_queue, []
+
         failed_syncs = []
-        for embedding_id in self.sync_queue:
+        for embedding_id in pending:
             try:
                 if self.db is None:
                     logger.warning(f"Cannot sync {embedding_id}: db store is not available")
@@ -45,9 +52,11 @@ class SyncEmbeddingStore:
                 logger.warning(f"Sync retry failed for {embedding_id}: {e}")
                 failed_syncs.append(embedding_id)
 
-        self.sync_queue = failed_syncs
+        # Keep anything queued while we were syncing
+        with self._queue_lock:
+            self.sync_queue = failed_syncs + self.sync_queue
 
-    def search_embeddings(self, query_embedding, top_k=5, threshold=0.7):
+    def search_embeddings(self, query_embedding, top_k=5, threshold=0.7, exclude_questions=False):
         """
         Search embeddings by delegating to the local or database store.
 
@@ -55,17 +64,18 @@ class SyncEmbeddingStore:
             query_embedding: numpy array or list representing the query vector
             top_k: number of results to return
             threshold: similarity threshold
+            exclude_questions: drop stored user questions and empty chunks
 
         Returns:
             List of matching embeddings from the first available store.
         """
         # Try searching in local_store first
         if self.local_store:
-            return self.local_store.search_embeddings(query_embedding, top_k, threshold)
+            return self.local_store.search_embeddings(query_embedding, top_k, threshold, exclude_questions)
 
         # Fallback to database store
         if self.db_store:
-            return self.db_store.search_embeddings(query_embedding, top_k, threshold)
+            return self.db_store.search_embeddings(query_embedding, top_k, threshold, exclude_questions)
 
         # If no stores are available, return empty list
         return []
@@ -82,6 +92,19 @@ class SyncEmbeddingStore:
                 db_success = False
 
         return local_success and db_success
+
+    def store_embedding_sets(self, embedding_sets):
+        local_success = self.local_store.store_embedding_sets(embedding_sets)
+        db_success = True
+
+        if self.db_store:
+            try:
+                db_success = self.db_store.store_embedding_sets(embedding_sets)
+            except Exception as e:
+                logger.warning(f"⚠️ DB store_embedding_sets failed: {e}")
+                db_success = False
+
+        return local_success and db_success
     
     def get_embedding_stats(self):
         return self.local_store.get_embedding_stats()
@@ -1,15 +1,29 @@
 from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 import os
+import threading
+
+from loguru import logger
+
+# PDFs downloaded at once
+DOWNLOAD_WORKERS = 8
+# Bytes fetched per request while streaming a file to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
 
 
 class DriveSync:
     def __init__(self, folder_id):
         self.folder_id = folder_id
         self.service = self._authenticate()
+        # The client's HTTP transport isn't thread-safe: one service per
+        # download thread
+        self._local = threading.local()
 
     def _authenticate(self):
         SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
@@ -28,7 +42,7 @@ class DriveSync:
                 try:
                     creds.refresh(Request())
                 except Exception as e:
-                    print(f"[WARN] Token refresh failed: {e}")
+                    logger.warning(f"⚠️ Token refresh failed: {e}")
                     creds = None  # Will trigger browser flow below
             if not creds or not creds.valid:
                 # Browser login as last resort
@@ -40,8 +54,52 @@ class DriveSync:
             with open(token_path, "w") as token:
                 token.write(creds.to_json())
 
+        self.creds = creds
         return build("drive", "v3", credentials=creds)
 
+    def _thread_service(self):
+        """Drive service for the calling download thread"""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = build("drive", "v3", credentials=self.creds, cache_discovery=False)
+            self._local.service = service
+        return service
+
+    @staticmethod
+    def _needs_download(local_path: Path, modified_time: str) -> bool:
+        """Missing locally, or changed on Drive since it was downloaded"""
+        try:
+            local_mtime = local_path.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if not modified_time:
+            return False
+        remote_mtime = datetime.fromisoformat(modified_time.replace("Z", "+00:00"))
+        return remote_mtime.timestamp() > local_mtime
+
+    def _download_one(self, file, local_path: Path):
+        """Stream one file next to local_path, then move it into place"""
+        request = self._thread_service().files().get_media(fileId=file["id"])
+        tmp_path = local_path.with_name(local_path.name + ".part")
+        try:
+            with open(tmp_path, "wb") as f:
+                downloader = MediaIoBaseDownload(
+                    f, request, chunksize=DOWNLOAD_CHUNK_SIZE
+                )
+                done = False
+                while not done:
+                    _, done = downloader.next_chunk()
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if file.get("modifiedTime"):
+            # Stamp with Drive's modifiedTime so later syncs can skip it
+            remote_mtime = datetime.fromisoformat(
+                file["modifiedTime"].replace("Z", "+00:00")
+            ).timestamp()
+            os.utime(local_path, (remote_mtime, remote_mtime))
+
     def download_new_pdfs(self, download_dir="data/raw_pdfs"):
         download_path = Path(download_dir)
 
@@ -54,14 +112,31 @@ class DriveSync:
             .execute()
         )
 
+        missing = [
+            file
+            for file in results.get("files", [])
+            if self._needs_download(download_path / file["name"], file.get("modifiedTime"))
+        ]
+
+        # Download concurrently (each is a network round trip plus transfer)
         new_files = []
-        for file in results.get("files", []):
-            local_path = download_path / file["name"]
-            if not local_path.exists():
-                request = self.service.files().get_media(fileId=file["id"])
-                with open(local_path, "wb") as f:
-                    f.write(request.execute())
-                new_files.append(file["name"])
-                print(f"Downloaded: {file['name']}")
+        if missing:
+            with ThreadPoolExecutor(
+                max_workers=min(DOWNLOAD_WORKERS, len(missing)),
+                thread_name_prefix="drive-download",
+            ) as pool:
+                futures = {
+                    pool.submit(self._download_one, file, download_path / file["name"]): file
+                    for file in missing
+                }
+                for future in as_completed(futures):
+                    file = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Download failed for {file['name']}: {e}")
+                        continue
+                    new_files.append(file["name"])
+                    logger.info(f"📥 Downloaded: {file['name']}")
 
         return new_files
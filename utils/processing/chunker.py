@@ -1,12 +1,12 @@
-import json
+import orjson
 import re
 from pathlib import Path
 from datetime import datetime
 import pdfplumber
 from hashlib import md5
+from loguru import logger
 from markitdown import MarkItDown
 from .metadata_extractor import MetadataExtractor
-from utils.core.embed import embed_texts_batch
 
 
 class PDFProcessor:
@@ -33,14 +33,12 @@ class PDFProcessor:
         if not markdown_text.strip():
             return []
 
-        # Debug: Print markdown preview
-        print("MARKDOWN PREVIEW:", markdown_text[:1000])
+        logger.debug("Markdown preview: {}", markdown_text[:1000])
 
         # Split by major headers (# and ##)
         sections = re.split(r"(^#{1,2}\s+.*$)", markdown_text, flags=re.MULTILINE)
 
-        # Debug: Print number of sections found
-        print("Number of sections found:", len(sections))
+        logger.debug("Number of sections found: {}", len(sections))
 
         chunks = []
         current_chunk = ""
@@ -88,8 +86,7 @@ class PDFProcessor:
         if not chunks:
             chunks = [markdown_text]
 
-        # Debug: Print number of chunks created
-        print("Chunks created (header-based):", len(chunks))
+        logger.debug("Chunks created (header-based): {}", len(chunks))
 
         return chunks
 
@@ -139,14 +136,13 @@ class PDFProcessor:
         if current_chunk:
             chunks.append(current_chunk.strip())
 
-        # Debug: Print number of chunks created by paragraph chunking
-        print("Chunks created (paragraph-based):", len(chunks))
+        logger.debug("Chunks created (paragraph-based): {}", len(chunks))
 
         # If still only one chunk and text is long, fallback to fixed-size word chunking
         if len(chunks) < 2 and self._count_words(markdown_text) > self.chunk_size:
-            print("[INFO] Fallback: chunking by fixed word count")
+            logger.debug("Fallback: chunking by fixed word count")
             chunks = self.chunk_by_fixed_word_count(markdown_text)
-            print("Chunks created (fixed-size):", len(chunks))
+            logger.debug("Chunks created (fixed-size): {}", len(chunks))
 
         return chunks if chunks else [markdown_text]
 
@@ -161,12 +157,22 @@ class PDFProcessor:
             chunks.append(chunk)
         return chunks
 
-    def process_pdf(self, pdf_path, force=False):
+    def output_path(self, pdf_path):
+        """Path of the chunked JSON file for a PDF"""
+        return self.output_dir / f"{pdf_path.name.replace('.pdf', '.json')}"
+
+    def chunk_pdf(self, pdf_path, force=False):
+        """
+        Extract, chunk and save a PDF to JSON without embedding it.
+
+        This is the CPU-heavy half of process_pdf and only returns plain dicts,
+        so it is safe to run in a worker process.
+        """
         filename = pdf_path.name
-        json_filename = self.output_dir / f"{filename.replace('.pdf', '.json')}"
+        json_filename = self.output_path(pdf_path)
 
         if json_filename.exists() and not force:
-            print(f"[SKIP] {filename} already processed")
+            logger.info(f"⏭️ {filename} already processed")
             return
 
         try:
@@ -181,14 +187,14 @@ class PDFProcessor:
 
                 # Fallback to pdfplumber if markitdown fails
                 if not markdown_text or len(markdown_text.strip()) < 100:
-                    print(
-                        f"[WARN] MarkItDown produced minimal content for {filename}, falling back to pdfplumber"
+                    logger.warning(
+                        f"⚠️ MarkItDown produced minimal content for {filename}, falling back to pdfplumber"
                     )
                     markdown_text = self._extract_with_pdfplumber(pdf_path)
 
             except Exception as e:
-                print(
-                    f"[WARN] MarkItDown failed for {filename}: {e}, falling back to pdfplumber"
+                logger.warning(
+                    f"⚠️ MarkItDown failed for {filename}: {e}, falling back to pdfplumber"
                 )
                 markdown_text = self._extract_with_pdfplumber(pdf_path)
 
@@ -226,26 +232,82 @@ class PDFProcessor:
                 )
 
             # Save to JSON
-            with open(json_filename, "w", encoding="utf-8") as f:
-                json.dump(chunked_docs, f, indent=2, ensure_ascii=False)
-
-            print(f"[OK] {filename} → {len(chunked_docs)} markdown chunks")
-            # Generate embeddings
-            texts = [doc["content"] for doc in chunked_docs]
-            embed_texts_batch(
-                texts=texts,
-                chunks=chunked_docs,
+            json_filename.write_bytes(orjson.dumps(chunked_docs))
+
+            logger.info(f"✅ {filename} → {len(chunked_docs)} markdown chunks")
+            return chunked_docs
+
+        except Exception as e:
+            logger.error(f"❌ Failed to process {filename}: {e}")
+
+    def embed_chunks(self, chunked_docs, json_filename):
+        """Generate and store embeddings for chunks produced by chunk_pdf"""
+        # Imported here so PDF pool workers (which only chunk) never load the model stack
+        from utils.core.embed import embed_texts_batch
+
+        texts = [doc["content"] for doc in chunked_docs]
+        embed_texts_batch(
+            texts=texts,
+            chunks=chunked_docs,
+            metadata={
+                "file_path": str(json_filename),
+                "chunk_count": len(chunked_docs),
+            },
+            store_results=True,
+        )
+
+    def embed_chunk_sets(self, chunk_sets):
+        """
+        Embed the chunks of several PDFs with one batched model call.
+
+        chunk_sets: list of (pdf_path, chunked_docs) pairs
+        Returns a list of (pdf_path, chunked_docs, embeddings) triples.
+        """
+        from utils.core.embed import embed_texts_batch
+
+        chunk_sets = [(pdf_path, docs) for pdf_path, docs in chunk_sets if docs]
+        texts = [doc["content"] for _, docs in chunk_sets for doc in docs]
+        if not texts:
+            return []
+
+        embeddings = embed_texts_batch(texts)
+        if len(embeddings) != len(texts):
+            logger.error(f"❌ Embedding failed for {len(chunk_sets)} PDFs")
+            return []
+
+        embedded_sets = []
+        start = 0
+        for pdf_path, docs in chunk_sets:
+            end = start + len(docs)
+            embedded_sets.append((pdf_path, docs, embeddings[start:end]))
+            start = end
+        return embedded_sets
+
+    def store_chunk_sets(self, embedded_sets):
+        """Store each PDF's embeddings (from embed_chunk_sets) under its own file entry"""
+        from utils.core.embed import store_embeddings_batch
+
+        for pdf_path, docs, embeddings in embedded_sets:
+            store_embeddings_batch(
+                embeddings,
+                [doc["content"] for doc in docs],
+                chunks=docs,
                 metadata={
-                    "file_path": str(json_filename),
-                    "chunk_count": len(chunked_docs),
+                    "file_path": str(self.output_path(pdf_path)),
+                    "chunk_count": len(docs),
                 },
-                store_results=True,
             )
 
+    def process_pdf(self, pdf_path, force=False):
+        chunked_docs = self.chunk_pdf(pdf_path, force=force)
+        if not chunked_docs:
             return chunked_docs
 
+        try:
+            self.embed_chunks(chunked_docs, self.output_path(pdf_path))
+            return chunked_docs
         except Exception as e:
-            print(f"[ERR] Failed to process {filename}: {e}")
+            logger.error(f"❌ Failed to process {pdf_path.name}: {e}")
 
     def _extract_with_pdfplumber(self, pdf_path):
         """Fallback text extraction using pdfplumber"""
@@ -259,8 +321,26 @@ class PDFProcessor:
 
     def process_all_pdfs(self, force=False):
         """Process all PDFs in the source directory"""
-        for pdf_file in self.source_dir.glob("*.pdf"):
-            self.process_pdf(pdf_file, force=force)
+        self.store_chunk_sets(
+            self.embed_chunk_sets(
+                [
+                    (pdf_file, self.chunk_pdf(pdf_file, force=force))
+                    for pdf_file in self.source_dir.glob("*.pdf")
+                ]
+            )
+        )
+
+
+# Per-process PDFProcessor used by chunk_pdf_worker
+_worker_processor = None
+
+
+def chunk_pdf_worker(pdf_path: str, force=False):
+    """Process-pool entry point: chunk a PDF with this process's PDFProcessor"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = PDFProcessor()
+    return _worker_processor.chunk_pdf(Path(pdf_path), force=force)
 
 
 # Test if running directly
@@ -274,16 +354,41 @@ from watchdog.events import FileSystemEventHandler
 
 
 class PDFWatcher(FileSystemEventHandler):
-    def __init__(self, processor):
+    def __init__(self, processor=None, queue=None, loop=None):
+        """
+        Watch a directory for PDFs.
+
+        With a ``queue`` and ``loop``, changed paths are handed to the event loop
+        (thread-safely) for a consumer to drain. Otherwise each new PDF is passed
+        straight to ``processor.process_pdf``.
+        """
         self.processor = processor
+        self.queue = queue
+        self.loop = loop
+
+    def _enqueue(self, src_path):
+        if isinstance(src_path, str) and src_path.endswith(".pdf"):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, Path(src_path))
 
     def on_created(self, event):
+        if event.is_directory:
+            return
+        if self.queue is not None:
+            self._enqueue(event.src_path)
         # Ensure event.src_path is a string and endswith receives a tuple as per lint
-        if isinstance(event.src_path, str) and event.src_path.endswith((".pdf",)):
-            print(f"New PDF detected: {event.src_path}")
+        elif isinstance(event.src_path, str) and event.src_path.endswith((".pdf",)):
+            logger.info(f"📄 New PDF detected: {event.src_path}")
             # Ensure Path receives a str, not bytes
             self.processor.process_pdf(Path(str(event.src_path)))
 
+    def on_modified(self, event):
+        if self.queue is not None and not event.is_directory:
+            self._enqueue(event.src_path)
+
+    def on_moved(self, event):
+        if self.queue is not None and not event.is_directory:
+            self._enqueue(event.dest_path)
+
 
 def start_watching(source_dir: str = "data/raw_pdfs"):
     processor = PDFProcessor()
@@ -291,5 +396,5 @@ def start_watching(source_dir: str = "data/raw_pdfs"):
     observer = Observer()
     observer.schedule(event_handler, source_dir, recursive=False)
     observer.start()
-    print(f"Watching {source_dir} for new PDFs...")
+    logger.info(f"👀 Watching {source_dir} for new PDFs...")
     return observer